@@ -3,22 +3,201 @@ Script de vérification de la configuration
 Vérifie que tout est bien configuré avant de démarrer
 """
 
+import functools
+import importlib.util
+import io
+import json
 import os
+import re
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from hc_cache import get_redis_info
+
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+_stdout_lock = threading.Lock()
+
+# Parsing .env en une passe (les commentaires ne matchent pas l'ancre)
+ENV_RE = re.compile(rb'^[ \t]*([A-Z_][A-Z0-9_]*)[ \t]*=[ \t]*(.*?)\s*$', re.M)
+FMT = "✓ {:30s} : {}"
+FMT_MISSING = "❌ {:30s} : MANQUANT"
+ENV_CACHED_PRESENT = "présent (.env inchangé)"
+
+ENV_CHECK_CACHE = Path.home() / '.cache' / 'mastodon_absa' / 'envcheck.json'
+
+# Variables requises
+_REQUIRED_ENV = (
+    ('MASTODON_INSTANCE_URL', 'Instance Mastodon'),
+    ('MASTODON_ACCESS_TOKEN', 'Token d\'accès Mastodon'),
+    ('REDIS_URL', 'URL Redis'),
+    ('QUEUE_NAME', 'Nom de la queue Redis'),
+    ('ES_HOST', 'Host Elasticsearch'),
+    ('FILTER_MODE', 'Mode de filtrage'),
+)
+
+# (module, package pip)
+_REQUIRED_PACKAGES = (
+    ('redis', 'redis'),
+    ('requests', 'requests'),
+    ('mastodon', 'Mastodon.py'),
+    ('transformers', 'transformers'),
+    ('torch', 'torch'),
+    ('elasticsearch', 'elasticsearch'),
+    ('spacy', 'spacy'),
+)
+
+# (composant, fichiers candidats par ordre de préférence)
+_PIPELINE_FILES = (
+    ('Collector', ('mastodon_stream.py', 'mastodon_collector.py', 'collector_mastodon.py')),
+    ('Worker V2', ('worker_absa_optimized_v2.py',)),
+    ('Worker (fallback)', ('worker_absa_optimized.py', 'absa_worker_realtime.py', 'worker_absa.py')),
+    ('Startup', ('startup_realtime_v2.py', 'startup_realtime.py')),
+)
+
+
+class _ThreadStdout:
+    """Redirige print() vers un buffer propre à chaque thread de vérification"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def capture(self, check):
+        """Exécuter une vérification et retourner (résultat, sortie console)"""
+        buf = io.StringIO()
+        self._local.buf = buf
+        try:
+            ok = check()
+        except Exception as e:
+            print(f"❌ {check.__name__} : {e}")
+            ok = False
+        finally:
+            self._local.buf = None
+        return ok, buf
+
+    def write(self, s):
+        buf = getattr(self._local, 'buf', None)
+        return (self._stream if buf is None else buf).write(s)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_checks(checks):
+    """Lancer les vérifications en parallèle, afficher leurs sorties dans l'ordre"""
+    stdout = _ThreadStdout(sys.stdout)
+    sys.stdout = stdout
+    outputs = {}
+    try:
+        with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+            futures = {pool.submit(stdout.capture, check): name for name, check in checks}
+            for future in as_completed(futures):
+                outputs[futures[future]] = future.result()
+    finally:
+        sys.stdout = stdout._stream
+    
+    results = {}
+    with _stdout_lock:
+        for name, _ in checks:
+            ok, buf = outputs[name]
+            sys.stdout.write(buf.getvalue())
+            results[name] = ok
+        sys.stdout.flush()
+    return results
+
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+ES_URL = 'http://localhost:9200'
+
+_session = None
+
+
+def get_session():
+    """Session HTTP partagée (keep-alive) pour les appels Elasticsearch"""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        _session = requests.Session()
+        _session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    return _session
+
+
 def print_header():
     print("\n" + "=" * 70)
     print("🔍 VÉRIFICATION DE LA CONFIGURATION")
     print("=" * 70 + "\n")
 
 
+@functools.lru_cache(maxsize=1)
+def _load_env():
+    """Parser le .env une seule fois par processus"""
+    return dict(ENV_RE.findall(Path('.env').read_bytes()))
+
+
+def _env_value(env_vars, var):
+    """Valeur affichable d'une variable du .env (token masqué), ou None si manquante"""
+    value = env_vars.get(var.encode())
+    if not value or value.startswith(b'#'):
+        return None
+    if var == 'MASTODON_ACCESS_TOKEN':
+        value = value[:8] + b"..." + value[-8:] if len(value) > 16 else b"***"
+    return value.decode('utf-8')
+
+
+def _validate_env():
+    """{variable: valeur affichable ou None si manquante} pour chaque variable requise"""
+    env_vars = _load_env()
+    return {var: _env_value(env_vars, var) for var, _ in _REQUIRED_ENV}
+
+
+def _read_env_check_cache(key):
+    try:
+        with open(ENV_CHECK_CACHE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached.get('present') if cached.get('key') == key else None
+
+
+def _write_env_check_cache(key, present):
+    """
+    Écriture atomique (fichier temporaire + os.replace)
+    Seulement la présence des variables, jamais leurs valeurs (URL Redis avec mot de passe, token...)
+    """
+    try:
+        ENV_CHECK_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ENV_CHECK_CACHE.with_suffix('.tmp')
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump({
+                'key': key,
+                'all_ok': all(present.values()),
+                'present': present,
+            }, f)
+        os.replace(tmp, ENV_CHECK_CACHE)
+    except OSError:
+        pass
+
+
 def check_env_file():
     """Vérifier que le fichier .env existe et contient les variables requises"""
     print("📄 Fichier .env")
     print("-" * 70)
     
-    if not Path('.env').exists():
+    try:
+        st = os.stat('.env')
+    except FileNotFoundError:
         print("❌ ERREUR : Fichier .env introuvable")
         print("   → Créez-le en copiant env.example")
         print("   → Ou lancez : python configure_filter_mode.py")
@@ -26,36 +205,24 @@ def check_env_file():
     
     print("✓ Fichier .env existe")
     
-    # Lire et parser le .env
-    env_vars = {}
-    with open('.env', 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                env_vars[key.strip()] = value.strip()
-    
-    # Variables requises
-    required = {
-        'MASTODON_INSTANCE_URL': 'Instance Mastodon',
-        'MASTODON_ACCESS_TOKEN': 'Token d\'accès Mastodon',
-        'REDIS_URL': 'URL Redis',
-        'QUEUE_NAME': 'Nom de la queue Redis',
-        'ES_HOST': 'Host Elasticsearch',
-        'FILTER_MODE': 'Mode de filtrage'
-    }
+    # Cache disque : si le .env n'a pas changé (même stat), il n'est ni relu ni parsé ;
+    # le cache ne connaît que la présence des variables, les valeurs ne sont donc pas affichées
+    key = [os.path.abspath('.env'), st.st_mtime_ns, st.st_size]
+    present = _read_env_check_cache(key)
+    if present is None:
+        values = _validate_env()
+        _write_env_check_cache(key, {var: value is not None for var, value in values.items()})
+    else:
+        values = {var: ENV_CACHED_PRESENT if present.get(var) else None for var, _ in _REQUIRED_ENV}
     
     all_ok = True
-    for var, description in required.items():
-        if var in env_vars and env_vars[var] and not env_vars[var].startswith('#'):
-            if var == 'MASTODON_ACCESS_TOKEN':
-                masked = env_vars[var][:8] + "..." + env_vars[var][-8:] if len(env_vars[var]) > 16 else "***"
-                print(f"✓ {description:30s} : {masked}")
-            else:
-                print(f"✓ {description:30s} : {env_vars[var]}")
-        else:
-            print(f"❌ {description:30s} : MANQUANT")
+    for var, description in _REQUIRED_ENV:
+        value = values[var]
+        if value is None:
+            print(FMT_MISSING.format(description))
             all_ok = False
+        else:
+            print(FMT.format(description, value))
     
     print()
     return all_ok
@@ -67,12 +234,12 @@ def check_redis():
     print("-" * 70)
     
     try:
-        import redis
-        client = redis.from_url('redis://localhost:6379', socket_connect_timeout=2)
+        from redis_client import get_client
+        client = get_client()
         client.ping()
         
-        # Stats Redis
-        info = client.info()
+        # Stats Redis : cache court partagé avec checkout.py
+        info = get_redis_info(REDIS_URL, client)
         print(f"✓ Redis connecté")
         print(f"  Version : {info.get('redis_version', 'N/A')}")
         print(f"  Clients : {info.get('connected_clients', 0)}")
@@ -97,38 +264,47 @@ def check_elasticsearch():
     print("-" * 70)
     
     try:
-        import requests
+        session = get_session()
         
-        # Connexion
-        response = requests.get('http://localhost:9200', timeout=2)
+        # Version + health en une seule requête
+        response = session.get(
+            f'{ES_URL}/_cluster/stats',
+            params={'filter_path': 'status,nodes.versions'},
+            timeout=2,
+        )
         if response.status_code != 200:
             print(f"❌ Elasticsearch répond avec code {response.status_code}")
             print()
             return False
         
-        info = response.json()
+        stats = loads(response.content)
+        versions = stats.get('nodes', {}).get('versions') or ['N/A']
         print(f"✓ Elasticsearch connecté")
-        print(f"  Version : {info.get('version', {}).get('number', 'N/A')}")
+        print(f"  Version : {', '.join(versions)}")
         
         # Health
-        health = requests.get('http://localhost:9200/_cluster/health', timeout=2).json()
-        status = health.get('status', 'unknown')
+        status = stats.get('status', 'unknown')
         
         if status == 'green':
             print(f"✓ Status : GREEN")
         elif status == 'yellow':
             print(f"⚠️  Status : YELLOW (acceptable mono-nœud)")
         else:
+            health = loads(session.get(f'{ES_URL}/_cluster/health', timeout=2).content)
             print(f"❌ Status : {status.upper()}")
             print(f"   Shards non assignés : {health.get('unassigned_shards', 0)}")
             print()
             return False
         
         # Indices
-        indices_response = requests.get('http://localhost:9200/_cat/indices/mastodon-*?format=json', timeout=2)
+        indices_response = session.get(
+            f'{ES_URL}/_cat/indices/mastodon-*',
+            params={'format': 'json', 'h': 'docs.count'},
+            timeout=2,
+        )
         if indices_response.status_code == 200:
-            indices = indices_response.json()
-            total_docs = sum(int(idx.get('docs.count', 0)) for idx in indices)
+            indices = loads(indices_response.content)
+            total_docs = sum(int(idx.get('docs.count') or 0) for idx in indices)
             print(f"  Indices : {len(indices)}")
             print(f"  Documents : {total_docs:,}")
         
@@ -152,22 +328,12 @@ def check_python_packages():
     print("📦 Packages Python")
     print("-" * 70)
     
-    required = {
-        'redis': 'redis',
-        'requests': 'requests',
-        'mastodon': 'Mastodon.py',
-        'transformers': 'transformers',
-        'torch': 'torch',
-        'elasticsearch': 'elasticsearch',
-        'spacy': 'spacy',
-    }
-    
     missing = []
-    for module, package in required.items():
-        try:
-            __import__(module)
+    for module, package in _REQUIRED_PACKAGES:
+        # find_spec ne fait que parcourir sys.path, sans exécuter le module
+        if importlib.util.find_spec(module) is not None:
             print(f"✓ {package}")
-        except ImportError:
+        else:
             print(f"❌ {package}")
             missing.append(package)
     
@@ -187,20 +353,13 @@ def check_worker_files():
     print("📁 Fichiers du pipeline")
     print("-" * 70)
     
-    files = {
-        'Collector': ['mastodon_stream.py', 'mastodon_collector.py', 'collector_mastodon.py'],
-        'Worker V2': ['worker_absa_optimized_v2.py'],
-        'Worker (fallback)': ['worker_absa_optimized.py', 'absa_worker_realtime.py', 'worker_absa.py'],
-        'Startup': ['startup_realtime_v2.py', 'startup_realtime.py'],
-    }
+    # Une seule énumération du répertoire au lieu d'un stat() par candidat
+    with os.scandir('.') as entries:
+        present = {e.name for e in entries if e.is_file()}
     
     all_ok = True
-    for component, filenames in files.items():
-        found = None
-        for filename in filenames:
-            if Path(filename).exists():
-                found = filename
-                break
+    for component, filenames in _PIPELINE_FILES:
+        found = next((f for f in filenames if f in present), None)
         
         if found:
             print(f"✓ {component:20s} : {found}")
@@ -216,13 +375,14 @@ def check_worker_files():
 def main():
     print_header()
     
-    checks = {
-        'Configuration .env': check_env_file(),
-        'Packages Python': check_python_packages(),
-        'Fichiers pipeline': check_worker_files(),
-        'Redis': check_redis(),
-        'Elasticsearch': check_elasticsearch(),
-    }
+    # Vérifications indépendantes → exécutées en parallèle
+    checks = run_checks((
+        ('Configuration .env', check_env_file),
+        ('Packages Python', check_python_packages),
+        ('Fichiers pipeline', check_worker_files),
+        ('Redis', check_redis),
+        ('Elasticsearch', check_elasticsearch),
+    ))
     
     # Résumé
     print("=" * 70)
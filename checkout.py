@@ -4,19 +4,148 @@ Vérifie que tous les composants fonctionnent correctement
 Teste spécifiquement le mode temps réel et mesure les latences
 """
 
+import argparse
+import importlib.metadata
+import importlib.util
+import io
+import os
+import pickle
+import re
+import socket
 import sys
 import time
 import logging
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from hc_cache import get_es_info, get_redis_info
 
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
     sys.stderr.reconfigure(encoding='utf-8')
 
+try:
+    import orjson
+    loads = orjson.loads
+    dumps = lambda obj: orjson.dumps(obj).decode()
+except ImportError:
+    import json
+    loads = json.loads
+    dumps = json.dumps
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# --deep : tests complets (inférence des modèles, écriture ES, /api/status Kibana)
+DEEP_MODE = False
+
+# Alias acceptés par --only
+CHECK_ALIASES = {
+    'redis': 'redis',
+    'es': 'elasticsearch',
+    'elasticsearch': 'elasticsearch',
+    'kibana': 'kibana',
+    'packages': 'packages',
+    'models': 'models',
+    'files': 'files',
+    'worker': 'worker',
+}
+
+HF_MODELS = (
+    ('XLM-RoBERTa NER', 'ner', 'Davlan/xlm-roberta-base-ner-hrl',
+     "I love the new iPhone from Apple"),
+    ('XLM-RoBERTa Sentiment', 'sentiment-analysis',
+     'cardiffnlp/twitter-xlm-roberta-base-sentiment-multilingual', "This is amazing!"),
+)
+MODEL_CHECK_CACHE = Path.home() / '.cache' / 'mastodon_absa' / 'model_check.pkl'
+
+_stdout_lock = threading.Lock()
+
+
+class _ThreadStdout:
+    """Redirige print() vers un buffer propre à chaque thread de check"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def capture(self, check):
+        """Exécuter un check et retourner (résultat, sortie console)"""
+        buf = io.StringIO()
+        self._local.buf = buf
+        try:
+            ok = check()
+        except Exception as e:
+            print(f"❌ {check.__name__}: {e}")
+            ok = False
+        finally:
+            self._local.buf = None
+        return ok, buf
+
+    def write(self, s):
+        buf = getattr(self._local, 'buf', None)
+        return (self._stream if buf is None else buf).write(s)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_checks(checks):
+    """Lancer les checks en parallèle, afficher leurs sorties dans l'ordre"""
+    stdout = _ThreadStdout(sys.stdout)
+    sys.stdout = stdout
+    outputs = {}
+    try:
+        with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+            futures = {pool.submit(stdout.capture, check): key for key, check in checks}
+            for future in as_completed(futures):
+                outputs[futures[future]] = future.result()
+    finally:
+        sys.stdout = stdout._stream
+    
+    results = {}
+    with _stdout_lock:
+        for key, _ in checks:
+            ok, buf = outputs[key]
+            sys.stdout.write(buf.getvalue())
+            results[key] = ok
+        sys.stdout.flush()
+    return results
+
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+ES_URL = 'http://localhost:9200'
+KIBANA_URL = 'http://localhost:5601'
+
+_session = None
+
+
+def get_session():
+    """Session HTTP partagée (keep-alive) pour Elasticsearch et Kibana"""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+
+def es_request(method, path, body=None, ignore=(), **kwargs):
+    """Appel REST Elasticsearch brut (évite d'importer le client elasticsearch)"""
+    if body is not None:
+        kwargs['data'] = dumps(body)
+        kwargs['headers'] = {'Content-Type': 'application/json'}
+    response = get_session().request(method, f'{ES_URL}{path}', timeout=3, **kwargs)
+    if response.status_code in ignore:
+        return None
+    response.raise_for_status()
+    return loads(response.content)
+
 
 def print_header():
     """Header stylisé"""
@@ -33,34 +162,40 @@ def check_redis():
     print("1️⃣  REDIS CHECK")
     print("=" * 70)
     try:
-        import redis
-        client = redis.from_url('redis://localhost:6379', socket_connect_timeout=3)
+        from redis_client import get_client
+        client = get_client()
         
-        # Test ping
-        start = time.time()
-        client.ping()
-        ping_ms = (time.time() - start) * 1000
+        # Ping + taille de queue en un seul aller-retour
+        pipe = client.pipeline(transaction=False)
+        pipe.ping()
+        pipe.llen('mastodon_queue')
         
-        # Infos Redis
-        info = client.info()
-        version = info.get('redis_version', 'N/A')
+        start = time.time()
+        _, queue_size = pipe.execute()
+        rtt_ms = (time.time() - start) * 1000
         
-        # Queue stats
-        queue_size = client.llen('mastodon_queue')
+        # Infos serveur : cache court partagé avec check_config.py
+        version = get_redis_info(REDIS_URL, client).get('redis_version', 'N/A')
         
         print(f"✅ Redis OK")
         print(f"   Version      : {version}")
-        print(f"   Latence ping : {ping_ms:.2f}ms")
+        print(f"   Latence RTT  : {rtt_ms:.2f}ms (pipeline)")
         print(f"   Queue size   : {queue_size} toots en attente")
         
-        # Test performance BLPOP
+        # Test performance BLPOP : la clé est remplie juste avant, donc pas d'attente
+        # (MULTI/EXEC : BLPOP ne bloque jamais dans une transaction)
         print(f"\n   Test BLPOP (mode temps réel)...")
-        start = time.time()
-        result = client.blpop('test_health_check', timeout=1)
-        blpop_ms = (time.time() - start) * 1000
+        pipe = client.pipeline(transaction=True)
+        pipe.lpush('_hc', '1')
+        pipe.blpop('_hc', timeout=0)
+        pipe.delete('_hc')
         
-        if blpop_ms < 1100:  # Devrait timeout à ~1000ms
-            print(f"   ✅ BLPOP OK : {blpop_ms:.0f}ms (timeout normal)")
+        start = time.perf_counter()
+        _, popped, _ = pipe.execute()
+        blpop_ms = (time.perf_counter() - start) * 1000
+        
+        if popped and blpop_ms < 100:
+            print(f"   ✅ BLPOP OK : {blpop_ms:.2f}ms (aller-retour LPUSH/BLPOP)")
         else:
             print(f"   ⚠️  BLPOP lent : {blpop_ms:.0f}ms")
         
@@ -87,59 +222,63 @@ def check_elasticsearch():
     print("2️⃣  ELASTICSEARCH CHECK")
     print("=" * 70)
     try:
-        from elasticsearch import Elasticsearch
-        es = Elasticsearch(['http://localhost:9200'], request_timeout=3)
-        
-        if not es.ping():
-            print(f"❌ Elasticsearch FAIL: Pas de réponse")
-            return False
-        
-        # Infos cluster
-        info = es.info()
+        # Infos cluster : cache court partagé avec check_config.py
+        info = get_es_info(ES_URL, get_session())
         version = info['version']['number']
         cluster_name = info['cluster_name']
         
+        # Stats réduites côté serveur (filter_path) au lieu de cat.indices
+        # (toujours interrogé : sert aussi de test de disponibilité)
+        stats = es_request(
+            'GET', '/mastodon-trends-*/_stats/docs,store',
+            params={'filter_path': 'indices.*.total.docs.count,indices.*.total.store.size_in_bytes'},
+        )
+        
         print(f"✅ Elasticsearch OK")
         print(f"   Version      : {version}")
         print(f"   Cluster      : {cluster_name}")
         
         # Stats des indices
         try:
-            indices = es.cat.indices(index='mastodon-trends-*', format='json')
+            indices = stats.get('indices') or {}
             
             if indices:
                 print(f"\n   Indices mastodon-trends :")
-                total_docs = 0
-                total_size = 0
                 
-                for idx in indices[-5:]:  # 5 derniers
-                    name = idx['index']
-                    docs = int(idx.get('docs.count', 0))
-                    size = idx.get('store.size', '0b')
-                    health = idx.get('health', 'unknown')
-                    
-                    health_icon = "🟢" if health == 'green' else "🟡" if health == 'yellow' else "🔴"
-                    print(f"     {health_icon} {name}: {docs} docs, {size}")
-                    
-                    total_docs += docs
+                for name in sorted(indices)[-5:]:  # 5 derniers
+                    total = indices[name].get('total', {})
+                    docs = total.get('docs', {}).get('count', 0)
+                    size_kb = total.get('store', {}).get('size_in_bytes', 0) / 1024
+                    print(f"     • {name}: {docs} docs, {size_kb:.0f}kb")
                 
+                # Total de tous les indices en un seul nombre
+                total_docs = es_request('GET', '/mastodon-trends-*/_count')['count']
                 print(f"\n   Total : {total_docs} documents indexés")
                 
-                # Test latence indexation
-                print(f"\n   Test latence indexation...")
-                test_doc = {
-                    "test": "health_check",
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                start = time.time()
-                es.index(index='health-check-test', id='test', body=test_doc)
-                index_ms = (time.time() - start) * 1000
-                
-                print(f"   ✅ Indexation : {index_ms:.2f}ms")
-                
-                # Nettoyer
-                es.indices.delete(index='health-check-test', ignore=[400, 404])
+                if DEEP_MODE:
+                    # Test latence indexation (écriture réelle, --deep uniquement)
+                    print(f"\n   Test latence indexation...")
+                    test_doc = {
+                        "test": "health_check",
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    
+                    start = time.time()
+                    es_request('PUT', '/health-check-test/_doc/test', body=test_doc)
+                    index_ms = (time.time() - start) * 1000
+                    
+                    print(f"   ✅ Indexation : {index_ms:.2f}ms")
+                    
+                    # Nettoyer
+                    es_request('DELETE', '/health-check-test', ignore=(400, 404))
+                else:
+                    # Test latence en lecture seule (ne modifie pas le cluster)
+                    print(f"\n   Test latence requête...")
+                    start = time.time()
+                    es_request('POST', '/_all/_search', body={'size': 0, 'query': {'match_none': {}}})
+                    index_ms = (time.time() - start) * 1000
+                    
+                    print(f"   ✅ Requête : {index_ms:.2f}ms")
                 
             else:
                 print(f"   ℹ️  Aucun indice mastodon-trends (normal au départ)")
@@ -161,11 +300,24 @@ def check_kibana():
     print("3️⃣  KIBANA CHECK")
     print("=" * 70)
     try:
-        import requests
-        response = requests.get('http://localhost:5601/api/status', timeout=3)
+        if not DEEP_MODE:
+            # Simple test de port TCP : n'active pas les agrégateurs de /api/status
+            # Même hôte/port que le mode --deep
+            kibana = urlsplit(KIBANA_URL)
+            port = kibana.port or (443 if kibana.scheme == 'https' else 80)
+            start = time.time()
+            with socket.create_connection((kibana.hostname, port), timeout=1):
+                connect_ms = (time.time() - start) * 1000
+            
+            print(f"✅ Kibana OK (port {port} ouvert, {connect_ms:.1f}ms)")
+            print(f"   URL     : {KIBANA_URL}")
+            print(f"   ℹ️  Version et état détaillé avec --deep")
+            return True
+        
+        response = get_session().get(f'{KIBANA_URL}/api/status', timeout=3)
         
         if response.status_code == 200:
-            status_data = response.json()
+            status_data = loads(response.content)
             version = status_data.get('version', {}).get('number', 'N/A')
             overall_state = status_data.get('status', {}).get('overall', {}).get('level', 'unknown')
             
@@ -184,30 +336,42 @@ def check_kibana():
         return False
 
 
+def installed_versions():
+    """{nom de distribution normalisé: version} en un seul parcours"""
+    versions = {}
+    for dist in importlib.metadata.distributions():
+        name = dist.metadata['Name']
+        if name:
+            versions.setdefault(re.sub(r'[-_.]+', '-', name).lower(), dist.version)
+    return versions
+
+
 def check_python_packages():
     """Vérifier les packages Python avec versions"""
     print("\n" + "=" * 70)
     print("4️⃣  PYTHON PACKAGES CHECK")
     print("=" * 70)
     
+    # module → (distribution, description)
     required_packages = {
-        'redis': 'Redis client',
-        'elasticsearch': 'Elasticsearch client',
-        'requests': 'HTTP requests',
-        'transformers': 'Hugging Face transformers',
-        'torch': 'PyTorch (backend)',
-        'mastodon': 'Mastodon.py (collector)',
-        'loguru': 'Logging (collector)',
+        'redis': ('redis', 'Redis client'),
+        'elasticsearch': ('elasticsearch', 'Elasticsearch client'),
+        'requests': ('requests', 'HTTP requests'),
+        'transformers': ('transformers', 'Hugging Face transformers'),
+        'torch': ('torch', 'PyTorch (backend)'),
+        'mastodon': ('mastodon-py', 'Mastodon.py (collector)'),
+        'loguru': ('loguru', 'Logging (collector)'),
     }
     
+    # Versions lues dans les métadonnées, sans importer les modules
+    versions = installed_versions()
     all_ok = True
     
-    for package, description in required_packages.items():
-        try:
-            module = __import__(package)
-            version = getattr(module, '__version__', 'N/A')
+    for package, (distribution, description) in required_packages.items():
+        if importlib.util.find_spec(package) is not None:
+            version = versions.get(distribution, 'N/A')
             print(f"✅ {package:20} v{version:10} - {description}")
-        except ImportError:
+        else:
             print(f"❌ {package:20} {'MANQUANT':11} - {description}")
             all_ok = False
     
@@ -218,72 +382,103 @@ def check_python_packages():
     return all_ok
 
 
+def _load_model_check_cache():
+    """Charger le cache {model_id: (révision, mtime)} des modèles déjà vérifiés"""
+    try:
+        with open(MODEL_CHECK_CACHE, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return {}
+
+
+def _save_model_check_cache(cache):
+    try:
+        MODEL_CHECK_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        with open(MODEL_CHECK_CACHE, 'wb') as f:
+            pickle.dump(cache, f)
+    except OSError:
+        pass
+
+
 def check_models_downloaded():
-    """Vérifier et tester les modèles Hugging Face"""
+    """Vérifier les modèles Hugging Face (inférence réelle avec --deep)"""
     print("\n" + "=" * 70)
     print("5️⃣  HUGGING FACE MODELS CHECK & PERFORMANCE")
     print("=" * 70)
     
+    # Ne payer l'import de transformers (plusieurs secondes) que s'il est installé
+    if importlib.util.find_spec('transformers') is None:
+        print("❌ Modèles: transformers non installé")
+        return False
+    
     try:
+        from transformers import AutoConfig, AutoTokenizer
+        from transformers.utils.hub import try_to_load_from_cache
+        
+        cache = _load_model_check_cache()
+        
+        for i, (label, task, model_id, test_text) in enumerate(HF_MODELS, 1):
+            print(f"Test {i}/{len(HF_MODELS)} : {label}...")
+            try:
+                # Présence dans le cache HF local, sans accès réseau
+                config_path = try_to_load_from_cache(model_id, 'config.json')
+                if not isinstance(config_path, str):
+                    print(f"   ❌ {label}: absent du cache local ({model_id})")
+                    return False
+                
+                snapshot = os.path.dirname(config_path)
+                key = (os.path.basename(snapshot), os.stat(snapshot).st_mtime)
+                
+                if cache.get(model_id) == key:
+                    print(f"   ✅ {label} (inchangé, révision {key[0][:8]})")
+                    continue
+                
+                start = time.time()
+                AutoConfig.from_pretrained(model_id, local_files_only=True)
+                tokenizer = AutoTokenizer.from_pretrained(model_id, local_files_only=True)
+                tokens = tokenizer(test_text)['input_ids']
+                load_time = time.time() - start
+                
+                print(f"   ✅ {label}")
+                print(f"      Config+tokenizer : {load_time:.2f}s")
+                print(f"      Tokens test      : {len(tokens)}")
+                cache[model_id] = key
+                
+            except Exception as e:
+                print(f"   ❌ {label}: {e}")
+                return False
+        
+        _save_model_check_cache(cache)
+        
+        if not DEEP_MODE:
+            print("\n   ℹ️  Inférence non testée (relancer avec --deep)")
+            return True
+        
         from transformers import pipeline
         
-        # Test NER
-        print("Test 1/2 : Modèle NER (extraction aspects)...")
-        try:
-            start = time.time()
-            ner_model = pipeline(
-                "ner",
-                model="Davlan/xlm-roberta-base-ner-hrl",
-                device=-1
-            )
-            load_time = time.time() - start
-            
-            # Test inference
-            test_text = "I love the new iPhone from Apple"
-            start = time.time()
-            result = ner_model(test_text)
-            inference_time = (time.time() - start) * 1000
-            
-            print(f"   ✅ XLM-RoBERTa NER")
-            print(f"      Chargement  : {load_time:.2f}s")
-            print(f"      Inférence   : {inference_time:.2f}ms")
-            print(f"      Aspects     : {len(result)} détectés")
-            
-        except Exception as e:
-            print(f"   ❌ XLM-RoBERTa NER: {e}")
-            return False
+        test_texts = [test_text for _, _, _, test_text in HF_MODELS]
+        total_latency = 0
         
-        # Test Sentiment
-        print("\nTest 2/2 : Modèle Sentiment...")
-        try:
-            start = time.time()
-            sentiment_model = pipeline(
-                "sentiment-analysis",
-                model="cardiffnlp/twitter-xlm-roberta-base-sentiment-multilingual",
-                device=-1
-            )
-            load_time = time.time() - start
-            
-            # Test inference
-            test_text = "This is amazing!"
-            start = time.time()
-            result = sentiment_model(test_text)
-            inference_time = (time.time() - start) * 1000
-            
-            sentiment = result[0]['label']
-            confidence = result[0]['score']
-            
-            print(f"   ✅ XLM-RoBERTa Sentiment")
-            print(f"      Chargement  : {load_time:.2f}s")
-            print(f"      Inférence   : {inference_time:.2f}ms")
-            print(f"      Test result : {sentiment} ({confidence:.2f})")
-            
-        except Exception as e:
-            print(f"   ❌ XLM-RoBERTa Sentiment: {e}")
-            return False
+        for label, task, model_id, _ in HF_MODELS:
+            try:
+                start = time.time()
+                model = pipeline(task, model=model_id, device=-1)
+                load_time = time.time() - start
+                
+                start = time.time()
+                model(test_texts)
+                inference_time = (time.time() - start) * 1000 / len(test_texts)
+                total_latency += inference_time
+                
+                print(f"\n   ✅ {label} (inférence)")
+                print(f"      Chargement  : {load_time:.2f}s")
+                print(f"      Inférence   : {inference_time:.2f}ms/texte")
+                
+            except Exception as e:
+                print(f"   ❌ {label}: {e}")
+                return False
         
         print("\n   ℹ️  Performance estimée:")
-        total_latency = inference_time * 2  # NER + Sentiment
         if total_latency < 100:
             print(f"      ⚡ Excellent : ~{total_latency:.0f}ms par toot")
         elif total_latency < 500:
@@ -305,8 +500,6 @@ def check_worker_files():
     print("6️⃣  PROJECT FILES CHECK")
     print("=" * 70)
     
-    import os
-    
     files_to_check = {
         'mastodon_stream.py': 'Collector (streaming)',
         'absa_worker_realtime.py': 'Worker temps réel (recommandé)',
@@ -315,10 +508,14 @@ def check_worker_files():
         '.env': 'Configuration (credentials)',
     }
     
+    # Une seule énumération du répertoire au lieu d'un stat() par fichier
+    with os.scandir('.') as entries:
+        present = {e.name for e in entries if e.is_file()}
+    
     all_ok = True
     
     for filename, description in files_to_check.items():
-        exists = os.path.exists(filename)
+        exists = filename in present
         icon = "✅" if exists else "❌"
         status = "OK" if exists else "MANQUANT"
         
@@ -335,6 +532,20 @@ def check_worker_files():
     return all_ok
 
 
+def tail(path, n=50, chunk=64 * 1024):
+    """Lire les n dernières lignes d'un fichier en remontant depuis la fin"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        while pos > 0 and data.count(b'\n') <= n:
+            step = min(chunk, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    return data.decode('utf-8', errors='replace').splitlines()[-n:]
+
+
 def check_worker_running():
     """Vérifier si le worker tourne et ses performances"""
     print("\n" + "=" * 70)
@@ -358,20 +569,21 @@ def check_worker_running():
         return False
     
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        log_stat = os.stat(log_file)
+        lines = tail(log_file, 50)
         
         if not lines:
             print(f"⚠️  Fichier log vide")
             return False
         
-        # Analyser le log
-        last_line = lines[-1]
-        is_realtime = 'TEMPS RÉEL' in ' '.join(lines[:10]) or 'realtime' in log_file
+        # Analyser le log (en-tête : 10 premières lignes)
+        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+            head = ''.join(f.readline() for _ in range(10))
+        is_realtime = 'TEMPS RÉEL' in head or 'realtime' in log_file
         
         print(f"✅ Log trouvé : {log_file}")
         print(f"   Mode        : {'⚡ TEMPS RÉEL' if is_realtime else '📦 Batch'}")
-        print(f"   Lignes      : {len(lines)}")
+        print(f"   Taille      : {log_stat.st_size / 1024:.0f} Ko")
         
         # Extraire les stats du log
         stats = {
@@ -381,7 +593,7 @@ def check_worker_running():
             'latence_ms': None
         }
         
-        for line in reversed(lines[-50:]):  # 50 dernières lignes
+        for line in reversed(lines):  # 50 dernières lignes
             if 'Traités' in line and ':' in line:
                 try:
                     stats['traites'] = int(line.split('Traités')[1].split(':')[1].strip().split()[0])
@@ -420,25 +632,20 @@ def check_worker_running():
                 else:
                     print(f"                     ❌ Lent (> 1s)")
         
-        # Vérifier activité récente
-        try:
-            timestamp_str = last_line.split('|')[0].strip()
-            # Format: 2024-12-12 10:30:45
-            last_time = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-            time_diff = datetime.now() - last_time
-            
-            print(f"\n   ⏰ Dernière activité :")
-            print(f"      {timestamp_str} ({time_diff.seconds}s ago)")
-            
-            if time_diff.seconds < 30:
-                print(f"      ✅ Worker ACTIF (< 30s)")
-            elif time_diff.seconds < 300:
-                print(f"      ⚠️  Dernière activité il y a {time_diff.seconds}s")
-            else:
-                print(f"      ❌ Worker probablement ARRÊTÉ (> 5min)")
-                return False
-        except:
-            print(f"   ℹ️  Impossible de parser la date")
+        # Vérifier activité récente (date de dernière écriture du log)
+        last_time = datetime.fromtimestamp(log_stat.st_mtime)
+        idle_s = int(time.time() - log_stat.st_mtime)
+        
+        print(f"\n   ⏰ Dernière activité :")
+        print(f"      {last_time:%Y-%m-%d %H:%M:%S} ({idle_s}s ago)")
+        
+        if idle_s < 30:
+            print(f"      ✅ Worker ACTIF (< 30s)")
+        elif idle_s < 300:
+            print(f"      ⚠️  Dernière activité il y a {idle_s}s")
+        else:
+            print(f"      ❌ Worker probablement ARRÊTÉ (> 5min)")
+            return False
         
         return True
         
@@ -454,8 +661,8 @@ def test_end_to_end_latency():
     print("=" * 70)
     
     try:
-        import redis
-        client = redis.from_url('redis://localhost:6379', decode_responses=True)
+        from redis_client import get_client
+        client = get_client()
         
         # Créer un toot de test
         test_toot = {
@@ -472,7 +679,7 @@ def test_end_to_end_latency():
         print(f"   Toot ID : {test_toot['toot_id']}")
         
         start = time.time()
-        client.rpush('mastodon_queue', json.dumps(test_toot))
+        client.rpush('mastodon_queue', dumps(test_toot))
         
         print(f"   ✅ Toot envoyé dans Redis")
         print(f"\n   ⏳ Attente traitement par le worker...")
@@ -498,15 +705,16 @@ def summary(results):
     print("📊 RÉSUMÉ & RECOMMANDATIONS")
     print("=" * 70)
     
-    checks = {
-        'Redis': results.get('redis'),
-        'Elasticsearch': results.get('elasticsearch'),
-        'Kibana': results.get('kibana'),
-        'Python packages': results.get('packages'),
-        'Hugging Face models': results.get('models'),
-        'Project files': results.get('files'),
-        'Worker': results.get('worker'),
+    labels = {
+        'redis': 'Redis',
+        'elasticsearch': 'Elasticsearch',
+        'kibana': 'Kibana',
+        'packages': 'Python packages',
+        'models': 'Hugging Face models',
+        'files': 'Project files',
+        'worker': 'Worker',
     }
+    checks = {label: results[key] for key, label in labels.items() if key in results}
     
     passed = sum(1 for v in checks.values() if v)
     total = len(checks)
@@ -536,35 +744,48 @@ def summary(results):
     print("=" * 70)
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Health check du pipeline Mastodon ABSA")
+    parser.add_argument('--deep', action='store_true',
+                        help="tests complets : inférence des modèles, écriture ES, /api/status Kibana")
+    parser.add_argument('--skip-models', action='store_true',
+                        help="ne pas vérifier les modèles Hugging Face (évite d'importer transformers)")
+    parser.add_argument('--only', type=lambda v: [c.strip() for c in v.split(',') if c.strip()],
+                        help=f"checks à lancer, ex: redis,es ({', '.join(CHECK_ALIASES)})")
+    args = parser.parse_args(argv)
+    
+    if args.only:
+        unknown = [c for c in args.only if c not in CHECK_ALIASES]
+        if unknown:
+            parser.error(f"check(s) inconnu(s) : {', '.join(unknown)}")
+        args.only = {CHECK_ALIASES[c] for c in args.only}
+    return args
+
+
+def main(argv=None):
     """Fonction principale"""
-    print_header()
+    global DEEP_MODE
+    args = parse_args(argv)
+    DEEP_MODE = args.deep
+    
+    checks = [
+        ('redis', check_redis),
+        ('elasticsearch', check_elasticsearch),
+        ('kibana', check_kibana),
+        ('packages', check_python_packages),
+        ('models', check_models_downloaded),
+        ('files', check_worker_files),
+        ('worker', check_worker_running),
+    ]
+    if args.skip_models:
+        checks = [c for c in checks if c[0] != 'models']
+    if args.only:
+        checks = [c for c in checks if c[0] in args.only]
     
-    time.sleep(0.5)
-    
-    results = {}
-    
-    # Tous les checks
-    results['redis'] = check_redis()
-    time.sleep(1)
-    
-    results['elasticsearch'] = check_elasticsearch()
-    time.sleep(1)
-    
-    results['kibana'] = check_kibana()
-    time.sleep(1)
-    
-    results['packages'] = check_python_packages()
-    time.sleep(1)
-    
-    results['models'] = check_models_downloaded()
-    time.sleep(1)
-    
-    results['files'] = check_worker_files()
-    time.sleep(1)
+    print_header()
     
-    results['worker'] = check_worker_running()
-    time.sleep(1)
+    # Checks indépendants → exécutés en parallèle
+    results = run_checks(checks) if checks else {}
     
     # Test optionnel end-to-end
     # results['e2e'] = test_end_to_end_latency()
@@ -7,12 +7,29 @@
 from dotenv import load_dotenv
 import os
 import redis
+from redis_client import get_client
 from loguru import logger
 import sys
 
 logger.remove()
 logger.add(sys.stderr, format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>", level="INFO")
 
+def _drain_queue(redis_client, queue_name, unlink=True):
+    """
+    Vide la liste et retourne (taille avant, taille après)
+    UNLINK libère la mémoire en tâche de fond : pas de blocage de Redis
+    sur une très grosse queue (contrairement à DEL)
+    """
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.llen(queue_name)
+    if unlink:
+        pipe.unlink(queue_name)
+    else:
+        pipe.delete(queue_name)
+    pipe.llen(queue_name)
+    queue_size, _, new_size = pipe.execute()
+    return queue_size, new_size
+
 def clear_queue():
     """
     Vide la queue Redis
@@ -22,11 +39,10 @@ def clear_queue():
     logger.info("=" * 60)
     
     load_dotenv()
-    redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
     queue_name = os.getenv('REDIS_QUEUE_NAME', 'mastodon_queue')
     
     try:
-        redis_client = redis.from_url(redis_url, decode_responses=True)
+        redis_client = get_client()
         redis_client.ping()
         logger.info("✓ Connexion à Redis réussie")
     except Exception as e:
@@ -34,21 +50,21 @@ def clear_queue():
         return False
     
     try:
-        # On récupère la taille actuelle
-        queue_size = redis_client.llen(queue_name)
-        logger.info(f"Taille actuelle de la queue '{queue_name}' : {queue_size} toots")
+        # Taille, suppression et vérification en une seule transaction (MULTI/EXEC) :
+        # la taille lue correspond exactement à ce qui est supprimé, même si
+        # le collecteur continue d'écrire
+        try:
+            queue_size, new_size = _drain_queue(redis_client, queue_name, unlink=True)
+        except redis.ResponseError:
+            # Serveur Redis < 4.0 : UNLINK inconnu, on repasse par DEL
+            queue_size, new_size = _drain_queue(redis_client, queue_name, unlink=False)
+        
+        logger.info(f"Taille de la queue '{queue_name}' avant vidage : {queue_size} toots")
         
         if queue_size == 0:
             logger.info("⚠ La queue est déjà vide !")
             return True
         
-        # On vide la queue en supprimant tous les éléments
-        # On utilise DEL pour supprimer toute la liste
-        redis_client.delete(queue_name)
-        
-        # On vérifie que c'est bien vide
-        new_size = redis_client.llen(queue_name)
-        
         if new_size == 0:
             logger.info(f"✓ Queue vidée avec succès ! ({queue_size} toots supprimés)")
             return True
@@ -4,14 +4,28 @@ VERSION SAFE - Préserve les credentials Mastodon existants
 """
 
 import os
+import re
 import sys
 from pathlib import Path
 
+# KEY=VALUE par ligne ; une ligne commençant par # ne matche pas
+# Les espaces autour de la clé et de la valeur restent hors des groupes : pas de strip()
+_ENV_RE = re.compile(r'^[ \t]*([^#=\s](?:[^=\n]*[^=\s])?)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.M)
+
+# Cache du .env parsé : (chemin, mtime_ns) → variables
+_ENV_CACHE = {}
+
+# Séparateurs d'affichage
+_SEP70 = "=" * 70
+_NL_SEP70 = "\n" + _SEP70
+
+_IS_WIN = sys.platform == 'win32'
+
 def print_menu():
     """Afficher le menu de sélection"""
-    print("\n" + "=" * 70)
+    print(_NL_SEP70)
     print("🔧 CONFIGURATION DU MODE DE FILTRAGE - MASTODON ABSA V2")
-    print("=" * 70)
+    print(_SEP70)
     print("\nChoisissez un mode de filtrage :\n")
     
     print("1. STRICT")
@@ -38,28 +52,27 @@ def print_menu():
     print("   • Taux de filtrage : ~60-70%")
     print("   • Usage : Volume maximal, exploration\n")
     
-    print("=" * 70)
+    print(_SEP70)
 
 
 def load_existing_env():
     """Charger le .env existant et parser les variables"""
-    env_vars = {}
+    try:
+        st = os.stat('.env')
+    except FileNotFoundError:
+        return {}
     
-    if not Path('.env').exists():
-        return env_vars
+    # Déjà parsé et inchangé depuis : copie pour que l'appelant ne modifie pas le cache
+    cache_key = (os.path.abspath('.env'), st.st_mtime_ns)
+    if cache_key in _ENV_CACHE:
+        return dict(_ENV_CACHE[cache_key])
     
-    with open('.env', 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            # Ignorer les commentaires et lignes vides
-            if not line or line.startswith('#'):
-                continue
-            # Parser les variables
-            if '=' in line:
-                key, value = line.split('=', 1)
-                env_vars[key.strip()] = value.strip()
+    # Lecture en un bloc, parsing par regex (commentaires et lignes vides ignorés)
+    text = Path('.env').read_text(encoding='utf-8')
+    env_vars = dict(_ENV_RE.findall(text))
     
-    return env_vars
+    _ENV_CACHE[cache_key] = env_vars
+    return dict(env_vars)
 
 
 def create_env_file(mode, existing_vars):
@@ -74,52 +87,59 @@ def create_env_file(mode, existing_vars):
     }
     
     # Merge : garder les valeurs existantes, ajouter les nouvelles
-    final_vars = {**defaults, **existing_vars}
+    final_vars = dict(defaults)
+    final_vars.update(existing_vars)
     
     # Mettre à jour le mode de filtrage
     final_vars['FILTER_MODE'] = mode
     
-    # Construire le contenu du fichier
-    env_content = f"""# Configuration MASTODON ABSA V2
-# Généré automatiquement - Ne pas éditer manuellement
-
-# Mode de filtrage (strict, balanced, permissive)
-FILTER_MODE={final_vars.get('FILTER_MODE', mode)}
-
-# Mastodon credentials
-"""
+    # Construire le contenu du fichier (une liste de lignes jointe une seule fois)
+    parts = [
+        "# Configuration MASTODON ABSA V2",
+        "# Généré automatiquement - Ne pas éditer manuellement",
+        "",
+        "# Mode de filtrage (strict, balanced, permissive)",
+        f"FILTER_MODE={final_vars['FILTER_MODE']}",
+        "",
+        "# Mastodon credentials",
+    ]
     
     # Ajouter les credentials Mastodon s'ils existent
     if 'MASTODON_INSTANCE_URL' in final_vars:
-        env_content += f"MASTODON_INSTANCE_URL={final_vars['MASTODON_INSTANCE_URL']}\n"
+        parts.append(f"MASTODON_INSTANCE_URL={final_vars['MASTODON_INSTANCE_URL']}")
     else:
-        env_content += "# MASTODON_INSTANCE_URL=https://mastodon.social\n"
+        parts.append("# MASTODON_INSTANCE_URL=https://mastodon.social")
     
     if 'MASTODON_ACCESS_TOKEN' in final_vars:
-        env_content += f"MASTODON_ACCESS_TOKEN={final_vars['MASTODON_ACCESS_TOKEN']}\n"
+        parts.append(f"MASTODON_ACCESS_TOKEN={final_vars['MASTODON_ACCESS_TOKEN']}")
     else:
-        env_content += "# MASTODON_ACCESS_TOKEN=votre_token_ici\n"
-    
-    env_content += f"""
-# Redis configuration
-REDIS_URL={final_vars['REDIS_URL']}
-QUEUE_NAME={final_vars['QUEUE_NAME']}
-
-# Elasticsearch configuration
-ES_HOST={final_vars['ES_HOST']}
-ES_INDEX_PREFIX={final_vars['ES_INDEX_PREFIX']}
-"""
+        parts.append("# MASTODON_ACCESS_TOKEN=votre_token_ici")
+    
+    parts += [
+        "",
+        "# Redis configuration",
+        f"REDIS_URL={final_vars['REDIS_URL']}",
+        f"QUEUE_NAME={final_vars['QUEUE_NAME']}",
+        "",
+        "# Elasticsearch configuration",
+        f"ES_HOST={final_vars['ES_HOST']}",
+        f"ES_INDEX_PREFIX={final_vars['ES_INDEX_PREFIX']}",
+    ]
+    env_content = "\n".join(parts) + "\n"
+    
+    # Écrire d'abord le nouveau contenu à côté : un crash ne laisse jamais .env à moitié écrit
+    with open('.env.tmp', 'w', encoding='utf-8') as f:
+        f.write(env_content)
+        f.flush()
+        os.fsync(f.fileno())
     
-    # Sauvegarder l'ancien .env
+    # Sauvegarder l'ancien .env (os.replace écrase .env.backup de façon atomique)
     if Path('.env').exists():
-        if Path('.env.backup').exists():
-            os.remove('.env.backup')
-        os.rename('.env', '.env.backup')
+        os.replace('.env', '.env.backup')
         print("✓ Ancien .env sauvegardé dans .env.backup")
     
-    # Écrire le nouveau .env
-    with open('.env', 'w', encoding='utf-8') as f:
-        f.write(env_content)
+    # Mettre le nouveau .env en place
+    os.replace('.env.tmp', '.env')
     
     print(f"✓ Fichier .env mis à jour avec mode : {mode.upper()}")
     
@@ -140,7 +160,7 @@ ES_INDEX_PREFIX={final_vars['ES_INDEX_PREFIX']}
 
 def create_startup_script(mode):
     """Créer un script de démarrage personnalisé"""
-    if sys.platform == 'win32':
+    if _IS_WIN:
         # Script Windows
         script_name = f'start_pipeline_{mode}.bat'
         content = f"""@echo off
@@ -158,11 +178,11 @@ export FILTER_MODE={mode}
 python3 startup_realtime_v2.py
 """
     
-    with open(script_name, 'w', encoding='utf-8') as f:
-        f.write(content)
+    script_path = Path(script_name)
+    script_path.write_text(content, encoding='utf-8')
     
-    if not sys.platform == 'win32':
-        os.chmod(script_name, 0o755)
+    if not _IS_WIN:
+        script_path.chmod(0o755)
     
     print(f"✓ Script de démarrage créé : {script_name}")
 
@@ -184,9 +204,9 @@ def main():
     
     mode = modes[choice]
     
-    print(f"\n" + "=" * 70)
+    print(_NL_SEP70)
     print(f"Configuration du mode : {mode.upper()}")
-    print("=" * 70)
+    print(_SEP70)
     
     # Charger le .env existant
     print("\nChargement de la configuration existante...")
@@ -209,9 +229,9 @@ def main():
     # Créer le script de démarrage
     create_startup_script(mode)
     
-    print("\n" + "=" * 70)
+    print(_NL_SEP70)
     print("✅ CONFIGURATION TERMINÉE")
-    print("=" * 70)
+    print(_SEP70)
     print(f"\nMode sélectionné : {mode.upper()}")
     
     if not credentials_ok:
@@ -224,7 +244,7 @@ def main():
         print("\n✅ Configuration complète - Prêt à démarrer")
         print("\nPour démarrer le pipeline :")
         
-        if sys.platform == 'win32':
+        if _IS_WIN:
             print(f"  → Double-cliquez sur : start_pipeline_{mode}.bat")
             print(f"  → Ou en ligne de commande : start_pipeline_{mode}.bat")
         else:
@@ -233,7 +253,7 @@ def main():
         print("\nPour changer de mode plus tard :")
         print("  → Relancez ce script : python configure_filter_mode.py")
     
-    print("\n" + "=" * 70 + "\n")
+    print(_NL_SEP70 + "\n")
 
 
 if __name__ == "__main__":
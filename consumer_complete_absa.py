@@ -8,18 +8,34 @@ Optimisations pour latence minimale (<500ms):
 - Caching des résultats
 """
 
-import redis
+import redis.asyncio as aioredis
 import json
 import asyncio
+import contextlib
 import time
-from datetime import datetime
-from typing import Dict, List, Optional
-from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Dict, List
+from collections import Counter, OrderedDict
 import re
 import sys
-from concurrent.futures import ThreadPoolExecutor
-from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
+import queue
+import threading
+from elasticsearch import BadRequestError, Elasticsearch
+from elasticsearch.helpers import streaming_bulk
+from elasticsearch.serializer import JSONSerializer
+
+try:
+    import orjson
+except ImportError:  # orjson optionnel : sérialiseur json standard du client
+    orjson = None
+
+if orjson is not None:
+    _dumps_bytes = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumps_bytes(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    _loads = json.loads
 
 # Fix encoding Windows
 if sys.platform == 'win32':
@@ -46,52 +62,190 @@ LIGHT_MODELS = True
 ES_INDEX_NAME = 'absa-analysis'  # Nom de l'index
 BATCH_INDEX_SIZE = 20  # Indexer par batch de 20
 BULK_REFRESH_INTERVAL = 2  # Seconds
+BULK_CHUNK_SIZE = 500  # Taille max d'un bulk quand la file se remplit plus vite qu'on n'envoie
+BULK_QUEUE_SIZE = BULK_CHUNK_SIZE  # Au-delà, index_analysis bloque (backpressure) ; >= BULK_CHUNK_SIZE pour qu'un bulk plein soit possible
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+
+# URLs et mentions retirées du texte avant analyse (jamais des aspects, et spaCy
+# travaille en temps linéaire sur le nombre de tokens)
+_URL_MENTION_RE = re.compile(r'https?://\S+|www\.\S+|t\.co/\S+|@\w+')
+
+# Séparateurs d'affichage
+_SEP70 = "=" * 70
+_NL_SEP70 = "\n" + _SEP70
 
 # ================================================
 # CACHE LRU SIMPLE
 # ================================================
-class LRUCache:
+class LRUCache(OrderedDict):
+    """LRU directement sur OrderedDict (type C) : pas d'indirection self.cache"""
+    
     def __init__(self, max_size=1000):
-        self.cache = {}
-        self.access_order = deque()
+        super().__init__()
         self.max_size = max_size
     
     def get(self, key):
-        if key in self.cache:
-            self.access_order.remove(key)
-            self.access_order.append(key)
-            return self.cache[key]
-        return None
+        # Hit : un seul move_to_end + lecture ; miss : KeyError
+        try:
+            self.move_to_end(key)
+        except KeyError:
+            return None
+        return self[key]
     
     def put(self, key, value):
-        if key in self.cache:
-            self.access_order.remove(key)
-        elif len(self.cache) >= self.max_size:
-            oldest = self.access_order.popleft()
-            del self.cache[oldest]
+        if key in self:
+            self.move_to_end(key)
+        elif len(self) >= self.max_size:
+            self.popitem(last=False)
         
-        self.cache[key] = value
-        self.access_order.append(key)
-    
-    def clear(self):
-        self.cache.clear()
-        self.access_order.clear()
+        self[key] = value
 
 
 # ================================================
 # ELASTICSEARCH MANAGER
 # ================================================
+class OrjsonSerializer(JSONSerializer):
+    """Sérialiseur du client ES basé sur orjson (produit directement des bytes)"""
+    def dumps(self, data):
+        if isinstance(data, (str, bytes)):
+            return super().dumps(data)
+        return orjson.dumps(data, default=self.default)
+
+
+# Mapping de l'index ABSA (construit une seule fois à l'import)
+_INDEX_MAPPING = {
+    "settings": {
+        "number_of_shards": 1,
+        "number_of_replicas": 0,
+        "refresh_interval": "1s"  # Refresh rapide pour temps réel
+    },
+    "mappings": {
+        "properties": {
+            # Identifiants
+            "toot_id": {"type": "keyword"},
+            "author": {"type": "keyword"},
+            "instance": {"type": "keyword"},
+            
+            # Texte
+            "text": {
+                "type": "text",
+                "analyzer": "standard",
+                "fields": {
+                    "raw": {"type": "keyword"}
+                }
+            },
+            "language": {"type": "keyword"},
+            
+            # Aspects (nested pour recherche avancée)
+            "aspects": {
+                "type": "nested",
+                "properties": {
+                    "aspect": {"type": "keyword"},
+                    "polarity": {"type": "keyword"},
+                    "confidence": {"type": "float"}
+                }
+            },
+            
+            # Sentiment global
+            "overall_sentiment": {
+                "type": "object",
+                "properties": {
+                    "polarity": {"type": "keyword"},
+                    "score": {"type": "float"}
+                }
+            },
+            
+            # Émotions (nested)
+            "emotions": {
+                "type": "nested",
+                "properties": {
+                    "emotion": {"type": "keyword"},
+                    "score": {"type": "float"}
+                }
+            },
+            
+            # Topic
+            "topic": {
+                "type": "object",
+                "properties": {
+                    "topic": {"type": "keyword"},
+                    "confidence": {"type": "float"}
+                }
+            },
+            
+            # Métadata
+            "created_at": {"type": "date"},
+            "latency_ms": {"type": "float"},
+            "hashtags": {"type": "keyword"},
+            "timestamp": {"type": "date"}
+        }
+    }
+}
+
+
+# Templates de recherche stockés côté serveur (mustache) : compilés une fois par ES,
+# le client n'envoie plus que l'id et les paramètres
+_SEARCH_TEMPLATES = {
+    'absa_search_by_aspect': """{
+        "query": {"nested": {"path": "aspects", "query": {"bool": {"must": [
+            {"match": {"aspects.aspect": {{#toJson}}aspect{{/toJson}}}}
+            {{#polarity}}, {"term": {"aspects.polarity": {{#toJson}}polarity{{/toJson}}}}{{/polarity}}
+        ]}}}},
+        "size": {{limit}},
+        "sort": [{"created_at": {"order": "desc"}}]
+    }""",
+    'absa_search_by_emotion': """{
+        "query": {"nested": {"path": "emotions", "query": {"bool": {"must": [
+            {"match": {"emotions.emotion": {{#toJson}}emotion{{/toJson}}}},
+            {"range": {"emotions.score": {"gte": {{min_score}}}}}
+        ]}}}},
+        "size": {{limit}},
+        "sort": [{"created_at": {"order": "desc"}}]
+    }""",
+    'absa_search_by_topic': """{
+        "query": {"term": {"topic.topic": {{#toJson}}topic{{/toJson}}}},
+        "size": {{limit}},
+        "sort": [{"created_at": {"order": "desc"}}]
+    }""",
+}
+
+
+def _expand_preserialized(item):
+    """Les actions sont déjà des couples (entête, source en bytes) : rien à développer"""
+    return item
+
+
 class ElasticsearchManager:
+    __slots__ = (
+        'es', 'index_name', '_queue', '_writer', '_stopping',
+        '_cached_ts', '_cached_ts_expiry',
+    )
+    
     def __init__(self, es_url=ELASTICSEARCH_URL, index_name=ES_INDEX_NAME):
         """Initialiser la connexion Elasticsearch"""
-        self.es = Elasticsearch([es_url])
+        # Pool HTTP keep-alive dimensionné sur les workers, bulks compressés en gzip
+        self.es = Elasticsearch(
+            [es_url],
+            serializer=OrjsonSerializer() if orjson is not None else None,
+            connections_per_node=WORKERS * 2,
+            http_compress=True,
+            request_timeout=10,
+            retry_on_timeout=True,
+            max_retries=2
+        )
         self.index_name = index_name
-        self.bulk_buffer = []
-        self.last_bulk_time = time.time()
+        # File bornée entre le hot path et le thread d'écriture (streaming_bulk)
+        self._queue = queue.Queue(maxsize=BULK_QUEUE_SIZE)
+        self._writer = None
+        self._stopping = False
+        
+        # Timestamp partagé par les docs d'une même fenêtre (évite un datetime.now() par toot)
+        self._cached_ts = None
+        self._cached_ts_expiry = 0.0
         
-        print("=" * 70)
+        print(_SEP70)
         print("INITIALISATION ELASTICSEARCH")
-        print("=" * 70)
+        print(_SEP70)
         
         try:
             # Test de connexion
@@ -105,180 +259,123 @@ class ElasticsearchManager:
         
         # Créer l'index s'il n'existe pas
         self._create_index()
+        self._register_search_templates()
         print(f"✓ Index '{self.index_name}' prêt\n")
+        
+        # Envoi des bulks dans un thread dédié (hors du hot path)
+        self._writer = threading.Thread(target=self._bulk_writer, name='es-bulk-writer', daemon=True)
+        self._writer.start()
     
     def _create_index(self):
-        """Créer l'index avec mapping optimal"""
-        if self.es.indices.exists(index=self.index_name):
-            return
-        
-        mapping = {
-            "settings": {
-                "number_of_shards": 1,
-                "number_of_replicas": 0,
-                "refresh_interval": "1s"  # Refresh rapide pour temps réel
-            },
-            "mappings": {
-                "properties": {
-                    # Identifiants
-                    "toot_id": {"type": "keyword"},
-                    "author": {"type": "keyword"},
-                    "instance": {"type": "keyword"},
-                    
-                    # Texte
-                    "text": {
-                        "type": "text",
-                        "analyzer": "standard",
-                        "fields": {
-                            "raw": {"type": "keyword"}
-                        }
-                    },
-                    "language": {"type": "keyword"},
-                    
-                    # Aspects (nested pour recherche avancée)
-                    "aspects": {
-                        "type": "nested",
-                        "properties": {
-                            "aspect": {"type": "keyword"},
-                            "polarity": {"type": "keyword"},
-                            "confidence": {"type": "float"}
-                        }
-                    },
-                    
-                    # Sentiment global
-                    "overall_sentiment": {
-                        "type": "object",
-                        "properties": {
-                            "polarity": {"type": "keyword"},
-                            "score": {"type": "float"}
-                        }
-                    },
-                    
-                    # Émotions (nested)
-                    "emotions": {
-                        "type": "nested",
-                        "properties": {
-                            "emotion": {"type": "keyword"},
-                            "score": {"type": "float"}
-                        }
-                    },
-                    
-                    # Topic
-                    "topic": {
-                        "type": "object",
-                        "properties": {
-                            "topic": {"type": "keyword"},
-                            "confidence": {"type": "float"}
-                        }
-                    },
-                    
-                    # Métadata
-                    "created_at": {"type": "date"},
-                    "latency_ms": {"type": "float"},
-                    "hashtags": {"type": "keyword"},
-                    "timestamp": {"type": "date"}
-                }
-            }
-        }
-        
-        self.es.indices.create(index=self.index_name, body=mapping)
+        """Créer l'index avec mapping optimal (un seul appel, idempotent)"""
+        try:
+            self.es.indices.create(index=self.index_name, body=_INDEX_MAPPING)
+        except BadRequestError as e:
+            # Index déjà présent : rien à faire
+            if 'resource_already_exists_exception' not in str(e):
+                raise
     
-    def index_analysis(self, analysis: Dict):
-        """Ajouter une analyse au buffer bulk"""
-        doc = {
-            "_index": self.index_name,
-            "_id": analysis['toot_id'],
-            "_source": {
-                **analysis,
-                "timestamp": datetime.now().isoformat()
-            }
-        }
-        self.bulk_buffer.append(doc)
-        
-        # Indexer si buffer plein ou timeout écoulé
-        if (len(self.bulk_buffer) >= BATCH_INDEX_SIZE or 
-            time.time() - self.last_bulk_time > BULK_REFRESH_INTERVAL):
-            self.flush_bulk()
+    def index_analysis(self, analysis: Dict) -> bytes:
+        """Mettre une analyse en file pour le bulk (retourne le document sérialisé)"""
+        now = time.monotonic()
+        if now > self._cached_ts_expiry:
+            self._cached_ts = datetime.now(timezone.utc).isoformat()
+            self._cached_ts_expiry = now + 0.25
+        
+        # Le dict d'analyse est propre à chaque toot : on le complète sans le recopier
+        analysis['timestamp'] = self._cached_ts
+        source = _dumps_bytes(analysis)
+        
+        # Bloque si le writer a BULK_QUEUE_SIZE docs de retard
+        self._queue.put(({"index": {"_index": self.index_name, "_id": analysis['toot_id']}}, source))
+        return source
+    
+    def _next_batch(self):
+        """
+        Docs de la file pour un bulk : on s'arrête à BULK_CHUNK_SIZE docs, à
+        BULK_REFRESH_INTERVAL écoulé, ou dès que la file est vide une fois
+        BATCH_INDEX_SIZE docs atteints (petits bulks au calme, gros bulks en charge)
+        """
+        deadline = time.monotonic() + BULK_REFRESH_INTERVAL
+        for n in range(BULK_CHUNK_SIZE):
+            try:
+                if n >= BATCH_INDEX_SIZE:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return
+            if item is None:
+                self._stopping = True
+                return
+            yield item
     
-    def flush_bulk(self):
-        """Indexer tous les documents du buffer"""
-        if not self.bulk_buffer:
+    def _bulk_writer(self):
+        """Thread d'écriture : un streaming_bulk par lot, jusqu'à close()"""
+        while not self._stopping:
+            indexed = failed = 0
+            try:
+                for ok, _ in streaming_bulk(
+                    self.es,
+                    self._next_batch(),
+                    chunk_size=BULK_CHUNK_SIZE,
+                    max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+                    expand_action_callback=_expand_preserialized,
+                    raise_on_error=False,
+                    raise_on_exception=False
+                ):
+                    if ok:
+                        indexed += 1
+                    else:
+                        failed += 1
+            except Exception as e:
+                print(f"✗ Erreur bulk indexing: {e}")
+                continue
+            
+            if failed:
+                print(f"⚠ Erreurs Elasticsearch: {failed} docs")
+            elif indexed:
+                print(f"✓ Indexed {indexed} documents")
+    
+    def close(self):
+        """Indexer les derniers docs et attendre la fin des envois"""
+        if self._writer is None:
             return
-        
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+    
+    def _register_search_templates(self):
+        """Enregistrer les templates de recherche (idempotent : PUT écrase)"""
         try:
-            # Bulk index
-            success, errors = bulk(self.es, self.bulk_buffer, raise_on_error=False)
-            
-            if errors:
-                print(f"⚠ Erreurs Elasticsearch: {len(errors)} docs")
-            else:
-                print(f"✓ Indexed {success} documents")
-            
-            self.bulk_buffer = []
-            self.last_bulk_time = time.time()
-            
+            for template_id, source in _SEARCH_TEMPLATES.items():
+                self.es.put_script(id=template_id, script={"lang": "mustache", "source": source})
         except Exception as e:
-            print(f"✗ Erreur bulk indexing: {e}")
+            print(f"⚠ Templates de recherche non enregistrés: {e}")
     
     def search_by_aspect(self, aspect: str, polarity: str = None, limit: int = 10):
         """Rechercher par aspect et polarity optionnelle"""
-        query = {
-            "query": {
-                "nested": {
-                    "path": "aspects",
-                    "query": {
-                        "bool": {
-                            "must": [
-                                {"match": {"aspects.aspect": aspect}}
-                            ]
-                        }
-                    }
-                }
-            },
-            "size": limit,
-            "sort": [{"created_at": {"order": "desc"}}]
-        }
-        
+        params = {"aspect": aspect, "limit": limit}
         if polarity:
-            query["query"]["nested"]["query"]["bool"]["must"].append(
-                {"term": {"aspects.polarity": polarity}}
-            )
+            params["polarity"] = polarity
         
-        return self.es.search(index=self.index_name, body=query)
+        return self.es.search_template(index=self.index_name, id='absa_search_by_aspect', params=params)
     
     def search_by_emotion(self, emotion: str, min_score: float = 0.5, limit: int = 10):
         """Rechercher par émotion"""
-        query = {
-            "query": {
-                "nested": {
-                    "path": "emotions",
-                    "query": {
-                        "bool": {
-                            "must": [
-                                {"match": {"emotions.emotion": emotion}},
-                                {"range": {"emotions.score": {"gte": min_score}}}
-                            ]
-                        }
-                    }
-                }
-            },
-            "size": limit,
-            "sort": [{"created_at": {"order": "desc"}}]
-        }
-        
-        return self.es.search(index=self.index_name, body=query)
+        return self.es.search_template(
+            index=self.index_name,
+            id='absa_search_by_emotion',
+            params={"emotion": emotion, "min_score": min_score, "limit": limit}
+        )
     
     def search_by_topic(self, topic: str, limit: int = 10):
         """Rechercher par topic"""
-        query = {
-            "query": {
-                "term": {"topic.topic": topic}
-            },
-            "size": limit,
-            "sort": [{"created_at": {"order": "desc"}}]
-        }
-        
-        return self.es.search(index=self.index_name, body=query)
+        return self.es.search_template(
+            index=self.index_name,
+            id='absa_search_by_topic',
+            params={"topic": topic, "limit": limit}
+        )
     
     def stats(self):
         """Obtenir les stats de l'index"""
@@ -288,25 +385,61 @@ class ElasticsearchManager:
 # ================================================
 # ANALYSEUR ABSA TEMPS RÉEL
 # ================================================
+def _inference_mode():
+    """torch.inference_mode() si torch est installé (pas d'autograd pendant les passes)"""
+    try:
+        import torch
+    except ImportError:
+        return contextlib.nullcontext()
+    return torch.inference_mode()
+
+
+def _quantize_model(model):
+    """Quantification dynamique INT8 des couches Linear (inférence CPU)"""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _classify_probs(model, tokenizer, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+    """
+    Probabilités (softmax) par label pour une liste de textes, sans pipeline HF :
+    tokenisation par paquet, softmax sur le device, un seul transfert vers le CPU
+    """
+    import torch
+    probs = []
+    for start in range(0, len(texts), batch_size):
+        enc = tokenizer(
+            texts[start:start + batch_size],
+            padding=True,
+            pad_to_multiple_of=8,  # formes alignées (Tensor Cores / noyaux INT8) sans tout padder à 256
+            truncation=True,
+            max_length=256,
+            return_tensors='pt'
+        ).to(model.device)
+        with torch.inference_mode():
+            logits = model(**enc).logits
+        probs.append(logits.float().softmax(dim=-1))
+    return torch.cat(probs).cpu().tolist()
+
+
 class RealtimeABSAAnalyzer:
     def __init__(self, es_manager: ElasticsearchManager):
-        print("=" * 70)
+        print(_SEP70)
         print("ANALYSEUR ABSA TEMPS RÉEL + ELASTICSEARCH")
-        print("=" * 70)
+        print(_SEP70)
         
         self.es_manager = es_manager
         self.nlp_models = {}
         self.sentiment_model = None
+        self.sentiment_tokenizer = None
         self.emotion_model = None
+        self.emotion_tokenizer = None
         self.zero_shot_model = None
         
         # Caching
         self.aspect_cache = LRUCache(CACHE_SIZE)
         self.sentiment_cache = LRUCache(CACHE_SIZE)
         
-        # Thread pool
-        self.executor = ThreadPoolExecutor(max_workers=WORKERS)
-        
         # Stats
         self.stats = {
             'total_processed': 0,
@@ -314,32 +447,46 @@ class RealtimeABSAAnalyzer:
             'cache_hits': 0,
             'es_indexed': 0,
             'avg_latency': 0.0,
-            'latencies': deque(maxlen=100),
             'start_time': datetime.now(),
-            'by_language': defaultdict(int),
-            'by_emotion': defaultdict(int),
+            'by_language': Counter(),
         }
         
+        # Compteurs d'émotions indexés par label (labels du modèle DistilBERT emotion)
+        self._emotion_labels = ['sadness', 'joy', 'love', 'anger', 'fear', 'surprise']
+        self._emotion_idx = {label: i for i, label in enumerate(self._emotion_labels)}
+        self._emotion_counts = [0] * len(self._emotion_labels)
+        
+        # Latences des 100 derniers toots : buffer circulaire + somme glissante (moyenne en O(1))
+        self._latency_ring = [0.0] * 100
+        self._latency_idx = 0
+        self._latency_count = 0
+        self._latency_sum = 0.0
+        
         # Stopwords
-        self.stopwords = {
+        self.stopwords = frozenset({
             'être', 'avoir', 'faire', 'the', 'a', 'an', 'and', 'or',
             'de', 'le', 'la', 'les', 'un', 'une', 'des', 'is', 'are'
-        }
+        })
         
         # Topics
         self.topic_labels = [
             "tech & AI", "politics", "business", "environment",
             "entertainment", "health", "education", "sports"
         ]
+        # Labels passés au zero-shot, figés une fois pour toutes
+        self._topic_labels = self.topic_labels[:4]
         
         # Patterns
-        self.url_pattern = re.compile(r'https?://[^\s]+|www\.[^\s]+|t\.co/[^\s]+')
-        self.mention_pattern = re.compile(r'@[\w]+')
+        # URL ou mention en tête d'aspect, en un seul match ; la regex n'est tentée
+        # que si le premier caractère peut ouvrir un de ces préfixes
+        self._bad_prefix_re = re.compile(r'(?:https?://|www\.|t\.co/)\S|@\w')
+        self._bad_prefix_chars = frozenset('hwt@')
         
         # Output
         self.output_file = None
         if SAVE_RESULTS:
-            self.output_file = open(OUTPUT_FILE, 'a', encoding='utf-8')
+            # Binaire : on y écrit directement les bytes JSON (UTF-8) produits pour ES
+            self.output_file = open(OUTPUT_FILE, 'ab')
         
         print("\n⚡ Chargement modèles légers...")
         self._init_models()
@@ -351,110 +498,194 @@ class RealtimeABSAAnalyzer:
             # spaCy
             try:
                 import spacy
-                self.nlp_models['en'] = spacy.load('en_core_web_sm')
+                # Seuls POS et lemmes servent : parser et NER désactivés
+                # (attribute_ruler reste : c'est lui qui renseigne token.pos_ pour le lemmatizer)
+                self.nlp_models['en'] = spacy.load('en_core_web_sm', disable=['parser', 'ner'])
                 print("  ✓ spaCy EN (lightweight)")
             except:
                 print("  ⚠ spaCy EN unavailable")
             
             # Transformers - Modèles légers
             try:
-                from transformers import pipeline
+                from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
                 
                 device = 0 if USE_GPU else -1
+                torch_device = 'cuda' if USE_GPU else 'cpu'
                 
+                # GPU : poids FP16 (moitié de VRAM et de bande passante, Tensor Cores)
+                dtype_kwargs = {}
+                if USE_GPU:
+                    import torch
+                    dtype_kwargs['torch_dtype'] = torch.float16
+                
+                # Sentiment et émotions : tokenizer + modèle directs (pas de pipeline),
+                # appelés sur des batchs de textes déjà tronqués
                 print("  Chargement sentiment (Twitter XLM-RoBERTa)...")
-                self.sentiment_model = pipeline(
-                    "sentiment-analysis",
-                    model="cardiffnlp/twitter-xlm-roberta-base-sentiment",
-                    device=device,
-                    truncation=True,
-                    max_length=256
-                )
+                model_id = "cardiffnlp/twitter-xlm-roberta-base-sentiment"
+                self.sentiment_tokenizer = AutoTokenizer.from_pretrained(model_id, use_fast=True)
+                self.sentiment_model = AutoModelForSequenceClassification.from_pretrained(
+                    model_id, **dtype_kwargs
+                ).to(torch_device).eval()
                 print("  ✓ Sentiment model (Twitter XLM-RoBERTa)")
                 
                 print("  Chargement émotions...")
-                self.emotion_model = pipeline(
-                    "text-classification",
-                    model="bhadresh-savani/distilbert-base-uncased-emotion",
-                    device=device,
-                    top_k=None,
-                    truncation=True,
-                    max_length=256
-                )
+                model_id = "bhadresh-savani/distilbert-base-uncased-emotion"
+                self.emotion_tokenizer = AutoTokenizer.from_pretrained(model_id, use_fast=True)
+                self.emotion_model = AutoModelForSequenceClassification.from_pretrained(
+                    model_id, **dtype_kwargs
+                ).to(torch_device).eval()
                 print("  ✓ Emotion model (DistilBERT)")
                 
                 print("  Chargement topic detection...")
                 self.zero_shot_model = pipeline(
                     "zero-shot-classification",
                     model="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1",
-                    device=device
+                    device=device,
+                    **dtype_kwargs
                 )
                 print("  ✓ Topic model (léger)")
                 
+                # CPU : poids INT8 pour les MatMul des trois encodeurs
+                if not USE_GPU:
+                    self.sentiment_model = _quantize_model(self.sentiment_model)
+                    self.emotion_model = _quantize_model(self.emotion_model)
+                    self.zero_shot_model.model = _quantize_model(self.zero_shot_model.model)
+                    print("  ✓ Modèles quantifiés INT8 (CPU)")
+                
             except Exception as e:
                 print(f"  ⚠ Transformers error: {e}")
         
         except ImportError as e:
             print(f"  ⚠ Missing deps: {e}")
     
-    def extract_aspects_fast(self, text: str, lang: str = 'en') -> List[str]:
-        """Extraction aspects ultra-rapide"""
-        cache_key = f"aspects:{hash(text)}"
-        cached = self.aspect_cache.get(cache_key)
-        if cached:
-            self.stats['cache_hits'] += 1
-            return cached
-        
+    def _aspects_from_doc(self, doc) -> List[str]:
+        """Aspects d'un Doc spaCy (noms, noms propres, adjectifs lemmatisés)"""
         aspects = set()
-        nlp = self.nlp_models.get(lang) or self.nlp_models.get('en')
+        stopwords = self.stopwords
+        bad_prefix_chars = self._bad_prefix_chars
+        bad_prefix_match = self._bad_prefix_re.match
+        for token in doc:
+            if token.pos_ in {"NOUN", "PROPN", "ADJ"}:
+                aspect = token.lemma_.lower().strip()
+                
+                if not 2 <= len(aspect) <= 30 or aspect in stopwords:
+                    continue
+                if aspect[:1] in bad_prefix_chars and bad_prefix_match(aspect):
+                    continue
+                aspects.add(aspect)
         
-        if nlp:
+        return list(aspects)[:8]
+    
+    def _aspects_fallback(self, text: str) -> List[str]:
+        """Aspects sans spaCy : mots du texte hors stopwords"""
+        # maxsplit : on ne découpe que les 50 premiers mots, minuscules mot à mot
+        stopwords = self.stopwords
+        aspects = {
+            word
+            for raw in text.split(maxsplit=50)[:50]
+            if 3 <= len(word := raw.lower().strip('.,!?;:()')) <= 30 and word not in stopwords
+        }
+        
+        return list(aspects)[:8]
+    
+    def extract_aspects_batch(self, texts: List[str], langs: List[str]) -> List[List[str]]:
+        """Aspects d'un batch : un seul nlp.pipe par modèle spaCy pour les textes hors cache"""
+        results = [None] * len(texts)
+        # Le texte sert directement de clé : son hash est calculé en C et mémorisé par le str
+        cache_keys = texts
+        pending = {}  # lang du modèle → (modèle, indices à traiter)
+        cache_hits = 0  # compteur local, reporté une fois dans self.stats
+        
+        for i, (text, lang) in enumerate(zip(texts, langs)):
+            cached = self.aspect_cache.get(cache_keys[i])
+            if cached:
+                cache_hits += 1
+                results[i] = cached
+                continue
+            
+            model_lang = lang if lang in self.nlp_models else 'en'
+            nlp = self.nlp_models.get(model_lang)
+            if nlp:
+                pending.setdefault(model_lang, (nlp, []))[1].append(i)
+            else:
+                results[i] = self._aspects_fallback(text)
+                self.aspect_cache.put(cache_keys[i], results[i])
+        
+        self.stats['cache_hits'] += cache_hits
+        
+        for nlp, indices in pending.values():
             try:
-                doc = nlp(text)
-                for token in doc:
-                    if token.pos_ in {"NOUN", "PROPN", "ADJ"}:
-                        aspect = token.lemma_.lower().strip()
-                        
-                        if (2 <= len(aspect) <= 30 and 
-                            aspect not in self.stopwords and
-                            not self.url_pattern.match(aspect) and
-                            not self.mention_pattern.match(aspect)):
-                            aspects.add(aspect)
-                
-                result = list(aspects)[:8]
-                self.aspect_cache.put(cache_key, result)
-                return result
-            except:
+                # as_tuples : chaque Doc revient avec son index, consommé aussitôt
+                docs = nlp.pipe(
+                    ((texts[i], i) for i in indices),
+                    as_tuples=True,
+                    batch_size=min(len(indices), 32)
+                )
+                for doc, i in docs:
+                    results[i] = self._aspects_from_doc(doc)
+            except Exception:
                 pass
+            
+            for i in indices:
+                if results[i] is None:
+                    results[i] = self._aspects_fallback(texts[i])
+                self.aspect_cache.put(cache_keys[i], results[i])
         
-        words = text.lower().split()[:50]
-        for word in words:
-            word = word.strip('.,!?;:()')
-            if 3 <= len(word) <= 30 and word not in self.stopwords:
-                aspects.add(word)
-        
-        result = list(aspects)[:8]
-        self.aspect_cache.put(cache_key, result)
-        return result
+        return results
     
-    def analyze_sentiment_fast(self, text: str, aspect: str) -> Dict:
-        """Analyse sentiment ultra-rapide avec cache"""
-        if not self.sentiment_model:
-            return {"polarity": "neutral", "score": 0.5}
+    def analyze_sentiment_batch(self, pairs: List[tuple]) -> List[Dict]:
+        """Sentiment de plusieurs (texte, aspect) en un seul appel au modèle (avec cache)"""
+        neutral = {"polarity": "neutral", "score": 0.5}
+        if self.sentiment_model is None:
+            return [neutral] * len(pairs)
+        
+        results = [None] * len(pairs)
+        contexts = []
+        owners = []  # index dans contexts → (index dans pairs, clé de cache)
+        split_texts = {}  # texte → [(phrase, phrase en minuscules)], découpé une seule fois
+        # texte → texte[:256] : un seul objet str par toot, dont le hash n'est calculé
+        # qu'une fois (CPython le mémorise) pour toutes les clés de ses aspects
+        key_texts = {}
+        cache_hits = 0
+        for i, (text, aspect) in enumerate(pairs):
+            text256 = key_texts.get(text)
+            if text256 is None:
+                text256 = key_texts[text] = text[:256]
+            cache_key = (aspect, text256)
+            cached = self.sentiment_cache.get(cache_key)
+            if cached:
+                cache_hits += 1
+                results[i] = cached
+                continue
+            
+            sentences = split_texts.get(text)
+            if sentences is None:
+                sentences = [(s, s.lower()) for s in text.split('.') if s]
+                split_texts[text] = sentences
+            
+            # Première phrase contenant l'aspect, sinon le texte entier
+            context = next((s for s, low in sentences if aspect in low), text)
+            contexts.append(context[:256])
+            owners.append((i, cache_key))
+        
+        self.stats['cache_hits'] += cache_hits
         
-        cache_key = f"sent:{aspect}:{hash(text[:256])}"
-        cached = self.sentiment_cache.get(cache_key)
-        if cached:
-            self.stats['cache_hits'] += 1
-            return cached
+        if not contexts:
+            return results
         
         try:
-            sentences = text.split('.')
-            aspect_sentences = [s for s in sentences if aspect in s.lower()][:1]
-            
-            context = (aspect_sentences[0] if aspect_sentences else text)[:256]
-            result = self.sentiment_model(context)[0]
+            outputs = _classify_probs(self.sentiment_model, self.sentiment_tokenizer, contexts)
+        except Exception:
+            outputs = [None] * len(contexts)
+        
+        id2label = self.sentiment_model.config.id2label
+        for (i, cache_key), probs in zip(owners, outputs):
+            if probs is None:
+                results[i] = neutral
+                continue
             
+            best = max(range(len(probs)), key=probs.__getitem__)
+            result = {'label': id2label[best], 'score': probs[best]}
             label = result['label'].lower()
             polarity = 'positive' if label in ['positive', 'pos'] else \
                       'negative' if label in ['negative', 'neg'] else 'neutral'
@@ -465,151 +696,193 @@ class RealtimeABSAAnalyzer:
             }
             
             self.sentiment_cache.put(cache_key, response)
-            return response
-        except Exception as e:
-            return {"polarity": "neutral", "score": 0.5}
+            results[i] = response
+        
+        return results
     
-    def detect_emotions_fast(self, text: str) -> List[Dict]:
-        """Émotions ultra-rapides"""
-        if not self.emotion_model:
-            return []
+    def detect_emotions_batch(self, texts256: List[str]) -> List[List[Dict]]:
+        """Émotions de tout un batch (textes déjà tronqués à 256) en un seul appel au modèle"""
+        if self.emotion_model is None:
+            return [[] for _ in texts256]
         
         try:
-            results = self.emotion_model(text[:256])
+            outputs = _classify_probs(self.emotion_model, self.emotion_tokenizer, texts256)
+        except Exception:
+            return [[] for _ in texts256]
+        
+        id2label = self.emotion_model.config.id2label
+        all_emotions = []
+        counts = self._emotion_counts
+        for probs in outputs:
             emotions = []
-            
-            for result in results[0]:
-                if result['score'] > 0.2:
+            for label_id, score in enumerate(probs):
+                if score > 0.2:
+                    label = id2label[label_id]
                     emotions.append({
-                        "emotion": result['label'],
-                        "score": round(result['score'], 3)
+                        "emotion": label,
+                        "score": round(score, 3)
                     })
-                    self.stats['by_emotion'][result['label']] += 1
+                    idx = self._emotion_idx.get(label)
+                    if idx is None:
+                        idx = self._add_emotion_label(label)
+                    counts[idx] += 1
             
             emotions.sort(key=lambda x: x['score'], reverse=True)
-            return emotions[:3]
-        except:
-            return []
+            all_emotions.append(emotions[:3])
+        return all_emotions
     
-    def detect_topic_fast(self, text: str) -> Dict:
-        """Détection topic rapide"""
+    def _add_emotion_label(self, label: str) -> int:
+        """Label inattendu (autre modèle) : nouvelle case de compteur"""
+        self._emotion_idx[label] = len(self._emotion_labels)
+        self._emotion_labels.append(label)
+        self._emotion_counts.append(0)
+        return self._emotion_idx[label]
+    
+    @property
+    def by_emotion(self) -> Dict[str, int]:
+        """Nombre de détections par émotion (construit à la demande)"""
+        return {label: n for label, n in zip(self._emotion_labels, self._emotion_counts) if n}
+    
+    def detect_topic_batch(self, texts: List[str]) -> List[Dict]:
+        """Topics de tout un batch en un seul appel au modèle"""
+        unknown = {"topic": "unknown", "confidence": 0.0}
         if not self.zero_shot_model:
-            return {"topic": "unknown", "confidence": 0.0}
+            return [unknown] * len(texts)
         
         try:
-            short_labels = self.topic_labels[:4]
-            result = self.zero_shot_model(
-                text[:200],
-                candidate_labels=short_labels,
-                multi_label=False
+            outputs = self.zero_shot_model(
+                [text[:200] for text in texts],
+                candidate_labels=self._topic_labels,
+                multi_label=False,
+                batch_size=16
             )
+            # Un seul texte : le pipeline renvoie un dict et non une liste
+            if isinstance(outputs, dict):
+                outputs = [outputs]
             
-            return {
-                "topic": result['labels'][0],
-                "confidence": round(result['scores'][0], 3)
-            }
-        except:
-            return {"topic": "unknown", "confidence": 0.0}
+            return [
+                {
+                    "topic": result['labels'][0],
+                    "confidence": round(result['scores'][0], 3)
+                }
+                for result in outputs
+            ]
+        except Exception:
+            return [unknown] * len(texts)
     
-    async def analyze_toot_async(self, toot: Dict) -> Optional[Dict]:
-        """Analyse async - indexation Elasticsearch"""
-        text = toot.get('text', '').strip()
-        lang = toot.get('lang', 'en')
-        
-        if not text or len(text) < 5:
-            return None
-        
+    def analyze_batch(self, toots: List[Dict]) -> List[Dict]:
+        """Analyse d'un batch de toots : une seule passe par modèle pour tout le batch"""
         start_time = time.time()
-        self.stats['total_processed'] += 1
-        self.stats['by_language'][lang] += 1
         
-        try:
-            loop = asyncio.get_event_loop()
+        # Filtrage
+        kept = []
+        for toot in toots:
+            text = toot.get('text', '').strip()
+            lang = toot.get('lang', 'en')
             
-            # Extraction aspects
-            aspects = self.extract_aspects_fast(text, lang)
-            if not aspects:
-                return None
+            if not text or len(text) < 5:
+                continue
             
-            # Sentiments par aspect (parallèle)
+            kept.append((toot, text, lang))
+        
+        self.stats['total_processed'] += len(kept)
+        self.stats['by_language'].update(lang for _, _, lang in kept)
+        
+        # Aspects de tout le batch (spaCy nlp.pipe)
+        all_aspects = self.extract_aspects_batch(
+            [text for _, text, _ in kept],
+            [lang for _, _, lang in kept]
+        )
+        items = [
+            (toot, text, lang, aspects[:6])
+            for (toot, text, lang), aspects in zip(kept, all_aspects)
+            if aspects
+        ]
+        
+        if not items:
+            return []
+        
+        # Entrées aplaties : (texte, aspect) de tous les toots, plus le sentiment global de chacun
+        pairs = []
+        for _, text, _, aspects in items:
+            pairs.extend((text, aspect) for aspect in aspects)
+            pairs.append((text, "overall"))
+        texts = [text for _, text, _, _ in items]
+        texts256 = [text[:256] for text in texts]  # tronqué une fois par toot
+        
+        with _inference_mode():
+            sentiments = self.analyze_sentiment_batch(pairs)
+            emotions = self.detect_emotions_batch(texts256)
+            topics = self.detect_topic_batch(texts)
+        
+        latency_ms = round((time.time() - start_time) * 1000, 1)
+        
+        # Redistribuer les résultats par toot
+        analyses = []
+        pos = 0
+        for (toot, text, lang, aspects), toot_emotions, topic in zip(items, emotions, topics):
             aspect_sentiments = []
-            tasks = []
-            for aspect in aspects[:6]:
-                task = loop.run_in_executor(
-                    self.executor,
-                    self.analyze_sentiment_fast,
-                    text,
-                    aspect
-                )
-                tasks.append((aspect, task))
-            
-            for aspect, task in tasks:
-                sentiment = await task
+            for aspect in aspects:
+                sentiment = sentiments[pos]
+                pos += 1
                 aspect_sentiments.append({
                     "aspect": aspect,
                     "polarity": sentiment['polarity'],
                     "confidence": sentiment.get('score', 0.0)
                 })
+            overall_sentiment = sentiments[pos]
+            pos += 1
             
-            # Émotions
-            emotions_task = loop.run_in_executor(
-                self.executor,
-                self.detect_emotions_fast,
-                text
-            )
-            emotions = await emotions_task
-            
-            # Topic
-            topic_task = loop.run_in_executor(
-                self.executor,
-                self.detect_topic_fast,
-                text
-            )
-            topic = await topic_task
-            
-            # Sentiment global
-            overall_task = loop.run_in_executor(
-                self.executor,
-                self.analyze_sentiment_fast,
-                text,
-                "overall"
-            )
-            overall_sentiment = await overall_task
-            
-            # Construire résultat
-            analysis = {
-                "toot_id": toot.get('toot_id'),
-                "created_at": toot.get('created_at'),
-                "language": lang,
-                "text": text[:150],
-                "instance": toot.get('instance'),
-                "author": toot.get('author_username'),
-                "aspects": aspect_sentiments,
-                "overall_sentiment": overall_sentiment,
-                "emotions": emotions,
-                "topic": topic,
-                "hashtags": toot.get('hashtags', []),
-                "latency_ms": round((time.time() - start_time) * 1000, 1)
-            }
-            
-            self.stats['total_analyzed'] += 1
-            self.stats['latencies'].append(analysis['latency_ms'])
-            self.stats['avg_latency'] = sum(self.stats['latencies']) / len(self.stats['latencies'])
-            
-            # ✨ INDEXER DANS ELASTICSEARCH ✨
-            self.es_manager.index_analysis(analysis)
-            self.stats['es_indexed'] += 1
-            
-            # Sauvegarder local
-            if self.output_file:
-                self.output_file.write(json.dumps(analysis, ensure_ascii=False) + '\n')
-                self.output_file.flush()
-            
-            return analysis
+            try:
+                analysis = {
+                    "toot_id": toot.get('toot_id'),
+                    "created_at": toot.get('created_at'),
+                    "language": lang,
+                    "text": text[:150],
+                    "instance": toot.get('instance'),
+                    "author": toot.get('author_username'),
+                    "aspects": aspect_sentiments,
+                    "overall_sentiment": overall_sentiment,
+                    "emotions": toot_emotions,
+                    "topic": topic,
+                    "hashtags": toot.get('hashtags', []),
+                    "latency_ms": latency_ms
+                }
+                
+                self._record_latency(latency_ms)
+                
+                # ✨ INDEXER DANS ELASTICSEARCH ✨
+                source = self.es_manager.index_analysis(analysis)
+                
+                # Sauvegarder local : même sérialisation que pour ES, pas de second json.dumps
+                if self.output_file:
+                    self.output_file.write(source + b'\n')
+                
+                analyses.append(analysis)
             
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            return None
+            except Exception as e:
+                print(f"✗ Error: {e}")
+        
+        # Compteurs du batch reportés en une fois
+        self.stats['total_analyzed'] += len(analyses)
+        self.stats['es_indexed'] += len(analyses)
+        
+        # Un seul flush du fichier local par batch (et non par toot)
+        if self.output_file and analyses:
+            self.output_file.flush()
+        
+        return analyses
+    
+    def _record_latency(self, latency_ms: float):
+        """Ajouter une latence au buffer circulaire et mettre à jour la moyenne"""
+        ring = self._latency_ring
+        idx = self._latency_idx
+        self._latency_sum += latency_ms - ring[idx]
+        ring[idx] = latency_ms
+        self._latency_idx = (idx + 1) % len(ring)
+        if self._latency_count < len(ring):
+            self._latency_count += 1
+        self.stats['avg_latency'] = self._latency_sum / self._latency_count
     
     def print_analysis_compact(self, analysis: Dict, count: int):
         """Affichage ultra-compact"""
@@ -631,22 +904,21 @@ class RealtimeABSAAnalyzer:
         """Stats temps réel"""
         elapsed = (datetime.now() - self.stats['start_time']).total_seconds()
         
-        print("\n" + "=" * 70)
+        print(_NL_SEP70)
         print(f"⚡ STATS TEMPS RÉEL - {elapsed:.0f}s")
-        print("=" * 70)
+        print(_SEP70)
         print(f"Traités:    {self.stats['total_processed']:4d} | "
               f"Analysés:    {self.stats['total_analyzed']:4d} | "
               f"Cache hits: {self.stats['cache_hits']:4d}")
         print(f"Latence:    {self.stats['avg_latency']:.1f}ms avg | "
               f"Débit:      {self.stats['total_analyzed']/elapsed:.1f} toot/s")
         print(f"Elasticsearch: {self.stats['es_indexed']} docs indexés")
-        print("=" * 70 + "\n")
+        print(_SEP70 + "\n")
     
     def close(self):
         if self.output_file:
             self.output_file.close()
-        self.executor.shutdown(wait=False)
-        self.es_manager.flush_bulk()  # Indexer les derniers docs
+        self.es_manager.close()  # Indexer les derniers docs
 
 
 # ================================================
@@ -655,20 +927,22 @@ class RealtimeABSAAnalyzer:
 async def consumer_realtime(analyzer, es_manager):
     """Consumer async pour latence minimale"""
     try:
-        redis_client = redis.from_url(
+        # Client asyncio : l'attente BLMPOP rend la main à la boucle ; bytes bruts
+        # (orjson/json.loads les décodent directement)
+        redis_client = aioredis.from_url(
             REDIS_URL,
-            decode_responses=True,
+            decode_responses=False,
             socket_connect_timeout=5
         )
-        redis_client.ping()
+        await redis_client.ping()
         print("✓ Redis OK\n")
     except:
         print("✗ Redis unavailable")
         return
     
-    print("=" * 70)
+    print(_SEP70)
     print("ANALYSE TEMPS RÉEL + ELASTICSEARCH EN COURS (Ctrl+C pour arrêter)")
-    print("=" * 70 + "\n")
+    print(_SEP70 + "\n")
     
     count = 0
     last_stats = time.time()
@@ -676,42 +950,51 @@ async def consumer_realtime(analyzer, es_manager):
     
     try:
         while True:
-            # Consommer sans bloquer
-            result = redis_client.blpop(QUEUE_NAME, timeout=0.5)
+            # Jusqu'à compléter le batch en un seul aller-retour (BLMPOP, Redis >= 7) ;
+            # l'attente côté serveur rend la main à la boucle : pas de sleep entre deux tours
+            result = await redis_client.blmpop(
+                0.5, 1, QUEUE_NAME,
+                direction='LEFT',
+                count=BATCH_SIZE - len(batch)
+            )
             
             if result:
-                _, toot_json = result
-                try:
-                    toot = json.loads(toot_json)
-                    batch.append(toot)
+                _, toot_jsons = result
+                for toot_json in toot_jsons:
+                    try:
+                        toot = _loads(toot_json)
+                    except ValueError:
+                        continue
                     
-                    # Traiter par batch
-                    if len(batch) >= BATCH_SIZE:
-                        tasks = [analyzer.analyze_toot_async(t) for t in batch]
-                        results = await asyncio.gather(*tasks)
-                        
-                        for analysis in results:
-                            if analysis:
-                                count += 1
-                                analyzer.print_analysis_compact(analysis, count)
-                        
-                        batch = []
+                    # Toots vides / trop courts écartés avant le batch
+                    text = _URL_MENTION_RE.sub('', toot.get('text') or '').strip()
+                    if len(text) < 5:
+                        continue
+                    toot['text'] = text
+                    batch.append(toot)
+            
+            # Traiter par batch ; batch partiel dès que la file est vide (BLMPOP expiré)
+            if len(batch) >= BATCH_SIZE or (batch and not result):
+                # Inférence batchée synchrone : pas de fan-out vers un pool de threads
+                results = analyzer.analyze_batch(batch)
                 
-                except json.JSONDecodeError:
-                    pass
+                for analysis in results:
+                    count += 1
+                    analyzer.print_analysis_compact(analysis, count)
+                
+                batch = []
             
             # Stats
             if time.time() - last_stats > 30:
                 analyzer.print_stats_realtime()
                 last_stats = time.time()
-            
-            await asyncio.sleep(0.01)
     
     except KeyboardInterrupt:
         print("\n\n✓ Arrêt demandé")
     finally:
         analyzer.print_stats_realtime()
         analyzer.close()
+        await redis_client.aclose()
         print(f"✓ {analyzer.stats['es_indexed']} documents indexés dans Elasticsearch")
 
 
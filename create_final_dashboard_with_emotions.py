@@ -13,12 +13,33 @@ import sys
 import json
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from typing import Dict, Optional
 
+try:
+    import orjson
+except ImportError:  # orjson optionnel : json standard
+    orjson = None
+
+# JSON compact (pas d'espace après , et :) : orjson l'est déjà, json standard doit le demander
+if orjson is not None:
+    def _dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    _dumps = partial(json.dumps, separators=(',', ':'))
+
 ES_URL = "http://localhost:9200"
 KIBANA_URL = "http://localhost:5601"
 HEADERS = {"kbn-xsrf": "true", "Content-Type": "application/json"}
 
+# POST Kibana simultanés lors de la création des visualisations
+VIZ_WORKERS = 6
+
+# Nouvelles tentatives d'un POST refusé par Kibana (429 / 503)
+VIZ_MAX_RETRIES = 3
+
 # PALETTE PASTELS
 PASTEL_COLORS = {
     "primary": "#B4D7E8",      # Bleu pastel
@@ -37,21 +58,44 @@ PASTEL_COLORS = {
     "disgust": "#DCEDC8"       # Lime pastel
 }
 
+def pastel_vis_colors():
+    return {
+        "Positive": PASTEL_COLORS["success"],
+        "Negative": PASTEL_COLORS["danger"],
+        "Neutral": PASTEL_COLORS["fear"],
+        "joy": PASTEL_COLORS["joy"],
+        "love": PASTEL_COLORS["love"],
+        "surprise": PASTEL_COLORS["surprise"],
+        "sadness": PASTEL_COLORS["sadness"],
+        "anger": PASTEL_COLORS["anger"],
+        "fear": PASTEL_COLORS["fear"],
+        "disgust": PASTEL_COLORS["disgust"],
+    }
+
+_PASTEL_VIS_COLORS = pastel_vis_colors()
+
 # ========================================
 # UTILITAIRES HTTP
 # ========================================
 
+# Session partagée : connexions keep-alive réutilisées (pool assez grand pour VIZ_WORKERS threads)
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_session.headers.update(HEADERS)
+
 def http_get(url, **kwargs):
     try:
-        r = requests.get(url, timeout=kwargs.get("timeout", 10))
+        r = _session.get(url, timeout=kwargs.get("timeout", 10))
         return r
     except Exception as e:
         print(f"✗ GET {url}: {e}")
         return None
 
-def http_post(url, payload=None, **kwargs):
+def http_post(url, payload=None, data=None, **kwargs):
+    """payload : dict sérialisé par requests ; data : corps JSON déjà encodé (bytes)"""
     try:
-        r = requests.post(url, headers=HEADERS, json=payload, timeout=kwargs.get("timeout", 15))
+        r = _session.post(url, json=payload, data=data, timeout=kwargs.get("timeout", 15))
         return r
     except Exception as e:
         print(f"✗ POST {url}: {e}")
@@ -59,7 +103,7 @@ def http_post(url, payload=None, **kwargs):
 
 def http_delete(url, **kwargs):
     try:
-        r = requests.delete(url, headers=HEADERS, timeout=kwargs.get("timeout", 10))
+        r = _session.delete(url, timeout=kwargs.get("timeout", 10))
         return r
     except Exception as e:
         print(f"✗ DELETE {url}: {e}")
@@ -294,407 +338,27 @@ def deep_cleanup():
     print(f"✓ Nettoyage: {deleted} objets supprimés")
 
 # ========================================
-# VISUALISATIONS CORRIGÉES
+# TEMPLATES DES VISUALISATIONS
 # ========================================
 
-def create_visualization(viz_def, data_view_id):
-    vis_state = {
-        "title": viz_def["title"],
-        "type": viz_def["type"]
-    }
-    
-    if viz_def["type"] == "markdown":
-        vis_state["params"] = viz_def.get("params", {})
-    else:
-        vis_state["aggs"] = viz_def["aggs"]
-        vis_state["params"] = viz_def.get("params", {})
-    
-    search_source = {
-        "index": data_view_id,
-        "filter": []
-    }
-    
-    if "filter" in viz_def:
-        search_source["query"] = {
-            "query": viz_def["filter"]["query"],
-            "language": viz_def["filter"]["language"]
-        }
-    else:
-        search_source["query"] = {"query": "", "language": "kuery"}
-    
-    payload = {
-        "attributes": {
-            "title": viz_def["title"],
-            "visState": json.dumps(vis_state),
-            "uiStateJSON": "{}",
-            "version": 1,
-            "kibanaSavedObjectMeta": {
-                "searchSourceJSON": json.dumps(search_source)
-            }
-        },
-        "references": [{
-            "name": "kibanaSavedObjectMeta.searchSourceJSON.index",
-            "type": "index-pattern",
-            "id": data_view_id
-        }]
-    }
-    
-    url = f"{KIBANA_URL}/api/saved_objects/visualization/{viz_def['id']}?overwrite=true"
-    r = http_post(url, payload=payload, timeout=12)
-    
-    if r and r.status_code in (200, 201):
-        print(f"  ✓ {viz_def['title']}")
-        return True
-    
-    print(f"  ✗ {viz_def['title']} - {r.status_code if r else 'no response'}")
-    return False
+# Champs par défaut (clé = clé de analyze_mapping)
+_DEFAULT_FIELDS = {
+    "aspects": "aspects.keyword",
+    "hashtags": "metadata.hashtags.keyword",
+    "sentiment_label": "sentiment.label.keyword",
+    "emotions": "emotions_flat"
+}
 
-def build_visualizations(data_view_id, fields: Dict[str, str]):
-    print("\n" + "="*80)
-    print("🎨 CRÉATION DES VISUALISATIONS (VERSION FINALE)")
-    print("="*80)
-    
-    ts = int(time.time())
-    
-    aspects_field = fields.get("aspects", "aspects.keyword")
-    hashtags_field = fields.get("hashtags", "metadata.hashtags.keyword")
-    sentiment_field = fields.get("sentiment_label", "sentiment.label.keyword")
-    emotions_field = fields.get("emotions", "emotions_flat")
-    
-    print(f"\n🔧 Champs utilisés:")
-    print(f"  • aspects: {aspects_field}")
-    print(f"  • hashtags: {hashtags_field}")
-    print(f"  • sentiment: {sentiment_field}")
-    print(f"  • emotions: {emotions_field}\n")
-    
-    visualizations = [
-        # 1. METRIC - Total (CORRIGÉ - structure simplifiée)
-        {
-            "id": f"viz-metric-total-{ts}",
-            "title": "📊 Total Mentions",
-            "type": "metric",
-            "aggs": [
-                {
-                    "id": "1",
-                    "enabled": True,
-                    "type": "count",
-                    "schema": "metric",
-                    "params": {}
-                }
-            ],
-            "params": {
-                "addTooltip": True,
-                "addLegend": False,
-                "type": "metric",
-                "visColors": pastel_vis_colors(),
-                "metric": {
-                    "percentageMode": False,
-                    "useRanges": False,
-                    "colorSchema": "Green to Red",
-                    "metricColorMode": "None",
-                    "colorsRange": [{"from": 0, "to": 10000}],
-                    "labels": {"show": True},
-                    "invertColors": False,
-                    "style": {
-                        "bgFill": "#000",
-                        "bgColor": False,
-                        "labelColor": False,
-                        "subText": "",
-                        "fontSize": 60
-                    }
-                }
-            }
-        },
-        
-        # 2. METRIC - Hashtags Uniques (CORRIGÉ)
-        {
-            "id": f"viz-metric-unique-{ts}",
-            "title": "#️⃣ Hashtags Uniques",
-            "type": "metric",
-            "aggs": [
-                {
-                    "id": "1",
-                    "enabled": True,
-                    "type": "cardinality",
-                    "schema": "metric",
-                    "params": {
-                        "field": hashtags_field
-                    }
-                }
-            ],
-            "params": {
-                "addTooltip": True,
-                "addLegend": False,
-                "type": "metric",
-                "metric": {
-                    "percentageMode": False,
-                    "useRanges": False,
-                    "colorSchema": "Green to Red",
-                    "metricColorMode": "None",
-                    "colorsRange": [{"from": 0, "to": 10000}],
-                    "labels": {"show": True},
-                    "invertColors": False,
-                    "style": {
-                        "bgFill": "#000",
-                        "bgColor": False,
-                        "labelColor": False,
-                        "subText": "",
-                        "fontSize": 60
-                    }
-                }
-            }
-        },
-        
-        # 3. DONUT - Sentiments (avec couleurs pastels)
-        {
-            "id": f"viz-donut-sent-{ts}",
-            "title": "💚 Répartition Sentiments",
-            "type": "pie",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "segment", "params": {
-                    "field": sentiment_field, "size": 5, "order": "desc", "orderBy": "1"
-                }}
-            ],
-            "params": {
-                "type": "pie",
-                "addTooltip": True,
-                "addLegend": True,
-                "legendPosition": "right",
-                "isDonut": True,
-                "labels": {"show": True, "values": True, "truncate": 100}
-            }
-        },
-        
-        # 4. DONUT - Émotions (avec couleurs pastels)
-        {
-            "id": f"viz-donut-emo-{ts}",
-            "title": "😊 Répartition Émotions",
-            "type": "pie",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "segment", "params": {
-                    "field": emotions_field, "size": 7, "order": "desc", "orderBy": "1"
-                }}
-            ],
-            "params": {
-                "type": "pie",
-                "addTooltip": True,
-                "addLegend": True,
-                "legendPosition": "right",
-                "isDonut": True,
-                "labels": {"show": True, "values": True, "truncate": 100}
-            }
-        },
-        
-        # 5. TAG CLOUD - Hashtags
-        {
-            "id": f"viz-tagcloud-{ts}",
-            "title": "☁️ Nuage de Hashtags",
-            "type": "tagcloud",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "segment", "params": {
-                    "field": hashtags_field, "size": 50, "order": "desc", "orderBy": "1", "min_doc_count": 2
-                }}
-            ],
-            "params": {
-                "scale": "linear",
-                "orientation": "single",
-                "minFontSize": 18,
-                "maxFontSize": 72,
-                "showLabel": True
-            }
-        },
-        
-        # 6. BAR - Top Hashtags
-        {
-            "id": f"viz-bar-hashtags-{ts}",
-            "title": "🔥 Top 15 Hashtags",
-            "type": "horizontal_bar",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "segment", "params": {
-                    "field": hashtags_field, "size": 15, "order": "desc", "orderBy": "1", "min_doc_count": 5
-                }}
-            ],
-            "params": {
-                "type": "histogram",
-                "addTooltip": True,
-                "addLegend": False,
-                "labels": {"show": True, "truncate": 100}
-            }
-        },
-        
-        # 7. BAR - Top Aspects
-        {
-            "id": f"viz-bar-aspects-{ts}",
-            "title": "🔎 Top 20 Aspects",
-            "type": "horizontal_bar",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "segment", "params": {
-                    "field": aspects_field, "size": 20, "order": "desc", "orderBy": "1", "min_doc_count": 5
-                }}
-            ],
-            "params": {
-                "type": "histogram",
-                "addTooltip": True,
-                "addLegend": False,
-                "labels": {"show": True, "truncate": 100}
-            }
-        },
-        
-        # 8. GROUPED BAR - Sent x Hashtag
-        {
-            "id": f"viz-group-sent-hashtag-{ts}",
-            "title": "📈 Sentiments par Hashtag",
-            "type": "histogram",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "segment", "params": {
-                    "field": hashtags_field, "size": 12, "order": "desc", "orderBy": "1", "min_doc_count": 10
-                }},
-                {"id": "3", "type": "terms", "schema": "group", "params": {
-                    "field": sentiment_field, "size": 5, "order": "desc", "orderBy": "1"
-                }}
-            ],
-            "params": {
-                "type": "histogram",
-                "addTooltip": True,
-                "addLegend": True,
-                "legendPosition": "right",
-                "labels": {"show": False},
-                "seriesParams": [{
-                    "show": True,
-                    "type": "histogram",
-                    "mode": "grouped",
-                    "data": {"label": "Count", "id": "1"},
-                    "valueAxis": "ValueAxis-1"
-                }]
-            }
-        },
-        
-        # 9. GROUPED BAR - Sent x Aspect
-        {
-            "id": f"viz-group-sent-aspect-{ts}",
-            "title": "📈 Sentiments par Aspect",
-            "type": "histogram",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "segment", "params": {
-                    "field": aspects_field, "size": 15, "order": "desc", "orderBy": "1", "min_doc_count": 10
-                }},
-                {"id": "3", "type": "terms", "schema": "group", "params": {
-                    "field": sentiment_field, "size": 5, "order": "desc", "orderBy": "1"
-                }}
-            ],
-            "params": {
-                "type": "histogram",
-                "addTooltip": True,
-                "addLegend": True,
-                "legendPosition": "right",
-                "labels": {"show": False},
-                "seriesParams": [{
-                    "show": True,
-                    "type": "histogram",
-                    "mode": "grouped",
-                    "data": {"label": "Count", "id": "1"},
-                    "valueAxis": "ValueAxis-1"
-                }]
-            }
-        },
-        
-        # 10. TABLE - Aspects Positifs
-        {
-            "id": f"viz-table-pos-{ts}",
-            "title": "✅ Aspects Appréciés",
-            "type": "table",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "bucket", "params": {
-                    "field": aspects_field, "size": 15, "order": "desc", "orderBy": "1", "min_doc_count": 5
-                }},
-                {"id": "3", "type": "terms", "schema": "bucket", "params": {
-                    "field": hashtags_field, "size": 3, "order": "desc", "orderBy": "1"
-                }}
-            ],
-            "params": {
-                "perPage": 15,
-                "showPartialRows": False,
-                "showMetricsAtAllLevels": True,
-                "showTotal": True
-            },
-            "filter": {
-                "query": f'{sentiment_field}:("positive" OR "pos")',
-                "language": "kuery"
-            }
-        },
-        
-        # 11. TABLE - Aspects Négatifs
-        {
-            "id": f"viz-table-neg-{ts}",
-            "title": "⚠️ Aspects Critiqués",
-            "type": "table",
-            "aggs": [
-                {"id": "1", "type": "count", "schema": "metric", "params": {}},
-                {"id": "2", "type": "terms", "schema": "bucket", "params": {
-                    "field": aspects_field, "size": 15, "order": "desc", "orderBy": "1", "min_doc_count": 5
-                }},
-                {"id": "3", "type": "terms", "schema": "bucket", "params": {
-                    "field": hashtags_field, "size": 3, "order": "desc", "orderBy": "1"
-                }}
-            ],
-            "params": {
-                "perPage": 15,
-                "showPartialRows": False,
-                "showMetricsAtAllLevels": True,
-                "showTotal": True
-            },
-            "filter": {
-                "query": f'{sentiment_field}:("negative" OR "neg")',
-                "language": "kuery"
-            }
-        },
-        
-        # 12. AREA STACKED - Évolution des Émotions
-{
-    "id": f"viz-area-emo-{ts}",
-    "title": "📊 Évolution des Émotions (7 jours)",
-    "type": "area",
-    "aggs": [
-        {"id": "1", "type": "count", "schema": "metric", "params": {}},
-        {"id": "2", "type": "date_histogram", "schema": "segment", "params": {
-            "field": "created_at",
-            "interval": "auto",
-            "min_doc_count": 1
-        }},
-        {"id": "3", "type": "terms", "schema": "group", "params": {
-            "field": emotions_field,
-            "size": 7,
-            "order": "desc",
-            "orderBy": "1"
-        }}
-    ],
-    "params": {
-        "type": "area",
-        "addTooltip": True,
-        "addLegend": True,
-        "legendPosition": "right",
-        "smoothLines": True,
-        "labels": {"show": False},
-        "stacked": "stacked"
-    }
-},
+# Marqueurs laissés dans les templates à la place des champs, remplacés dans _compile_templates
+_FIELD_MARKERS = {
+    "aspects": "__ASPECTS__",
+    "hashtags": "__HASHTAGS__",
+    "sentiment_label": "__SENTIMENT__",
+    "emotions": "__EMOTIONS__"
+}
 
-        
-        # 13. MARKDOWN - Guide enrichi
-        {
-            "id": f"viz-guide-{ts}",
-            "title": "📖 Guide du Dashboard",
-            "type": "markdown",
-            "params": {
-                "markdown": """# 🎯 Dashboard ABSA - Analyse de Sentiments
+# Guide markdown (viz 13), champs en {aspects}, {hashtags}, {sentiment_label}, {emotions}
+_GUIDE_TEMPLATE = """# 🎯 Dashboard ABSA - Analyse de Sentiments
 
 ---
 
@@ -709,10 +373,10 @@ Ce dashboard analyse en temps réel les **sentiments** et **émotions** des post
 ### Champs mappés
 | Champ | Mapping ES |
 |-------|-----------|
-| **Aspects** | `""" + aspects_field + """` |
-| **Hashtags** | `""" + hashtags_field + """` |
-| **Sentiments** | `""" + sentiment_field + """` |
-| **Émotions** | `""" + emotions_field + """` |
+| **Aspects** | `{aspects}` |
+| **Hashtags** | `{hashtags}` |
+| **Sentiments** | `{sentiment_label}` |
+| **Émotions** | `{emotions}` |
 
 ---
 
@@ -799,68 +463,517 @@ Les émotions traduisent un **ressenti précis** :
 
 *Dashboard créé avec ❤️ pour l'analyse ABSA*
 """
+
+_VIZ_DEFS = [
+    # 1. METRIC - Total (CORRIGÉ - structure simplifiée)
+    {
+        "id": "viz-metric-total-__TS__",
+        "title": "📊 Total Mentions",
+        "type": "metric",
+        "aggs": [
+            {
+                "id": "1",
+                "enabled": True,
+                "type": "count",
+                "schema": "metric",
+                "params": {}
+            }
+        ],
+        "params": {
+            "addTooltip": True,
+            "addLegend": False,
+            "type": "metric",
+            "visColors": _PASTEL_VIS_COLORS,
+            "metric": {
+                "percentageMode": False,
+                "useRanges": False,
+                "colorSchema": "Green to Red",
+                "metricColorMode": "None",
+                "colorsRange": [{"from": 0, "to": 10000}],
+                "labels": {"show": True},
+                "invertColors": False,
+                "style": {
+                    "bgFill": "#000",
+                    "bgColor": False,
+                    "labelColor": False,
+                    "subText": "",
+                    "fontSize": 60
+                }
             }
         }
-    ]
+    },
     
-    created_ids = []
-    for viz in visualizations:
-        if create_visualization(viz, data_view_id):
-            created_ids.append(viz["id"])
-        time.sleep(0.2)
+    # 2. METRIC - Hashtags Uniques (CORRIGÉ)
+    {
+        "id": "viz-metric-unique-__TS__",
+        "title": "#️⃣ Hashtags Uniques",
+        "type": "metric",
+        "aggs": [
+            {
+                "id": "1",
+                "enabled": True,
+                "type": "cardinality",
+                "schema": "metric",
+                "params": {
+                    "field": "__HASHTAGS__"
+                }
+            }
+        ],
+        "params": {
+            "addTooltip": True,
+            "addLegend": False,
+            "type": "metric",
+            "metric": {
+                "percentageMode": False,
+                "useRanges": False,
+                "colorSchema": "Green to Red",
+                "metricColorMode": "None",
+                "colorsRange": [{"from": 0, "to": 10000}],
+                "labels": {"show": True},
+                "invertColors": False,
+                "style": {
+                    "bgFill": "#000",
+                    "bgColor": False,
+                    "labelColor": False,
+                    "subText": "",
+                    "fontSize": 60
+                }
+            }
+        }
+    },
+    
+    # 3. DONUT - Sentiments (avec couleurs pastels)
+    {
+        "id": "viz-donut-sent-__TS__",
+        "title": "💚 Répartition Sentiments",
+        "type": "pie",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "segment", "params": {
+                "field": "__SENTIMENT__", "size": 5, "order": "desc", "orderBy": "1"
+            }}
+        ],
+        "params": {
+            "type": "pie",
+            "addTooltip": True,
+            "addLegend": True,
+            "legendPosition": "right",
+            "isDonut": True,
+            "labels": {"show": True, "values": True, "truncate": 100}
+        }
+    },
+    
+    # 4. DONUT - Émotions (avec couleurs pastels)
+    {
+        "id": "viz-donut-emo-__TS__",
+        "title": "😊 Répartition Émotions",
+        "type": "pie",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "segment", "params": {
+                "field": "__EMOTIONS__", "size": 7, "order": "desc", "orderBy": "1"
+            }}
+        ],
+        "params": {
+            "type": "pie",
+            "addTooltip": True,
+            "addLegend": True,
+            "legendPosition": "right",
+            "isDonut": True,
+            "labels": {"show": True, "values": True, "truncate": 100}
+        }
+    },
+    
+    # 5. TAG CLOUD - Hashtags
+    {
+        "id": "viz-tagcloud-__TS__",
+        "title": "☁️ Nuage de Hashtags",
+        "type": "tagcloud",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "segment", "params": {
+                "field": "__HASHTAGS__", "size": 50, "order": "desc", "orderBy": "1", "min_doc_count": 2
+            }}
+        ],
+        "params": {
+            "scale": "linear",
+            "orientation": "single",
+            "minFontSize": 18,
+            "maxFontSize": 72,
+            "showLabel": True
+        }
+    },
+    
+    # 6. BAR - Top Hashtags
+    {
+        "id": "viz-bar-hashtags-__TS__",
+        "title": "🔥 Top 15 Hashtags",
+        "type": "horizontal_bar",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "segment", "params": {
+                "field": "__HASHTAGS__", "size": 15, "order": "desc", "orderBy": "1", "min_doc_count": 5
+            }}
+        ],
+        "params": {
+            "type": "histogram",
+            "addTooltip": True,
+            "addLegend": False,
+            "labels": {"show": True, "truncate": 100}
+        }
+    },
+    
+    # 7. BAR - Top Aspects
+    {
+        "id": "viz-bar-aspects-__TS__",
+        "title": "🔎 Top 20 Aspects",
+        "type": "horizontal_bar",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "segment", "params": {
+                "field": "__ASPECTS__", "size": 20, "order": "desc", "orderBy": "1", "min_doc_count": 5
+            }}
+        ],
+        "params": {
+            "type": "histogram",
+            "addTooltip": True,
+            "addLegend": False,
+            "labels": {"show": True, "truncate": 100}
+        }
+    },
+    
+    # 8. GROUPED BAR - Sent x Hashtag
+    {
+        "id": "viz-group-sent-hashtag-__TS__",
+        "title": "📈 Sentiments par Hashtag",
+        "type": "histogram",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "segment", "params": {
+                "field": "__HASHTAGS__", "size": 12, "order": "desc", "orderBy": "1", "min_doc_count": 10
+            }},
+            {"id": "3", "type": "terms", "schema": "group", "params": {
+                "field": "__SENTIMENT__", "size": 5, "order": "desc", "orderBy": "1"
+            }}
+        ],
+        "params": {
+            "type": "histogram",
+            "addTooltip": True,
+            "addLegend": True,
+            "legendPosition": "right",
+            "labels": {"show": False},
+            "seriesParams": [{
+                "show": True,
+                "type": "histogram",
+                "mode": "grouped",
+                "data": {"label": "Count", "id": "1"},
+                "valueAxis": "ValueAxis-1"
+            }]
+        }
+    },
+    
+    # 9. GROUPED BAR - Sent x Aspect
+    {
+        "id": "viz-group-sent-aspect-__TS__",
+        "title": "📈 Sentiments par Aspect",
+        "type": "histogram",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "segment", "params": {
+                "field": "__ASPECTS__", "size": 15, "order": "desc", "orderBy": "1", "min_doc_count": 10
+            }},
+            {"id": "3", "type": "terms", "schema": "group", "params": {
+                "field": "__SENTIMENT__", "size": 5, "order": "desc", "orderBy": "1"
+            }}
+        ],
+        "params": {
+            "type": "histogram",
+            "addTooltip": True,
+            "addLegend": True,
+            "legendPosition": "right",
+            "labels": {"show": False},
+            "seriesParams": [{
+                "show": True,
+                "type": "histogram",
+                "mode": "grouped",
+                "data": {"label": "Count", "id": "1"},
+                "valueAxis": "ValueAxis-1"
+            }]
+        }
+    },
+    
+    # 10. TABLE - Aspects Positifs
+    {
+        "id": "viz-table-pos-__TS__",
+        "title": "✅ Aspects Appréciés",
+        "type": "table",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "bucket", "params": {
+                "field": "__ASPECTS__", "size": 15, "order": "desc", "orderBy": "1", "min_doc_count": 5
+            }},
+            {"id": "3", "type": "terms", "schema": "bucket", "params": {
+                "field": "__HASHTAGS__", "size": 3, "order": "desc", "orderBy": "1"
+            }}
+        ],
+        "params": {
+            "perPage": 15,
+            "showPartialRows": False,
+            "showMetricsAtAllLevels": True,
+            "showTotal": True
+        },
+        "filter": {
+            "query": '__SENTIMENT__:("positive" OR "pos")',
+            "language": "kuery"
+        }
+    },
+    
+    # 11. TABLE - Aspects Négatifs
+    {
+        "id": "viz-table-neg-__TS__",
+        "title": "⚠️ Aspects Critiqués",
+        "type": "table",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "terms", "schema": "bucket", "params": {
+                "field": "__ASPECTS__", "size": 15, "order": "desc", "orderBy": "1", "min_doc_count": 5
+            }},
+            {"id": "3", "type": "terms", "schema": "bucket", "params": {
+                "field": "__HASHTAGS__", "size": 3, "order": "desc", "orderBy": "1"
+            }}
+        ],
+        "params": {
+            "perPage": 15,
+            "showPartialRows": False,
+            "showMetricsAtAllLevels": True,
+            "showTotal": True
+        },
+        "filter": {
+            "query": '__SENTIMENT__:("negative" OR "neg")',
+            "language": "kuery"
+        }
+    },
+    
+    # 12. AREA STACKED - Évolution des Émotions
+    {
+        "id": "viz-area-emo-__TS__",
+        "title": "📊 Évolution des Émotions (7 jours)",
+        "type": "area",
+        "aggs": [
+            {"id": "1", "type": "count", "schema": "metric", "params": {}},
+            {"id": "2", "type": "date_histogram", "schema": "segment", "params": {
+                "field": "created_at",
+                "interval": "auto",
+                "min_doc_count": 1
+            }},
+            {"id": "3", "type": "terms", "schema": "group", "params": {
+                "field": "__EMOTIONS__",
+                "size": 7,
+                "order": "desc",
+                "orderBy": "1"
+            }}
+        ],
+        "params": {
+            "type": "area",
+            "addTooltip": True,
+            "addLegend": True,
+            "legendPosition": "right",
+            "smoothLines": True,
+            "labels": {"show": False},
+            "stacked": "stacked"
+        }
+    },
+    
+    # 13. MARKDOWN - Guide enrichi
+    {
+        "id": "viz-guide-__TS__",
+        "title": "📖 Guide du Dashboard",
+        "type": "markdown",
+        "params": {
+            "markdown": _GUIDE_TEMPLATE.format_map(_FIELD_MARKERS)
+        }
+    }
+]
+
+def _serialize_viz(viz_def):
+    """
+    Corps complet du POST sérialisé une seule fois, à l'import, en bytes UTF-8
+    Les champs, le data view (__DVID__) et le timestamp de l'id (__TS__) restent des marqueurs
+    """
+    vis_state = {
+        "title": viz_def["title"],
+        "type": viz_def["type"]
+    }
+    
+    if viz_def["type"] == "markdown":
+        vis_state["params"] = viz_def.get("params", {})
+    else:
+        vis_state["aggs"] = viz_def["aggs"]
+        vis_state["params"] = viz_def.get("params", {})
+    
+    search_source = {
+        "index": "__DVID__",
+        "filter": []
+    }
+    
+    if "filter" in viz_def:
+        search_source["query"] = {
+            "query": viz_def["filter"]["query"],
+            "language": viz_def["filter"]["language"]
+        }
+    else:
+        search_source["query"] = {"query": "", "language": "kuery"}
     
-    print(f"\n✓ {len(created_ids)}/13 visualisations créées")
+    payload = {
+        "attributes": {
+            "title": viz_def["title"],
+            "visState": _dumps(vis_state),
+            "uiStateJSON": "{}",
+            "version": 1,
+            "kibanaSavedObjectMeta": {
+                "searchSourceJSON": _dumps(search_source)
+            }
+        },
+        "references": [{
+            "name": "kibanaSavedObjectMeta.searchSourceJSON.index",
+            "type": "index-pattern",
+            "id": "__DVID__"
+        }]
+    }
+    
+    return viz_def["id"], viz_def["title"], _dumps(payload).encode("utf-8")
+
+# (viz_id, titre, corps JSON en bytes) avec marqueurs
+_VIZ_TEMPLATES = [_serialize_viz(viz_def) for viz_def in _VIZ_DEFS]
+
+def _fill(template, replacements):
+    for placeholder, value in replacements:
+        template = template.replace(placeholder, value)
+    return template
+
+@lru_cache(maxsize=4)
+def _compile_templates(data_view_id, *field_values):
+    """
+    Corps JSON (bytes) des POST de visualisation pour un data view et un jeu de champs
+    Mis en cache : d'un appel à l'autre seul le timestamp des ids (__TS__) change
+    """
+    # Substitution brute dans le JSON (même dans visState, encodé deux fois) : valable car
+    # noms de champs et id de data view ne contiennent ni guillemet ni antislash
+    replacements = tuple(
+        (marker.encode("utf-8"), value.encode("utf-8"))
+        for marker, value in zip(_FIELD_MARKERS.values(), field_values)
+    ) + ((b"__DVID__", data_view_id.encode("utf-8")),)
+    
+    return tuple(
+        (viz_id_tpl, title, _fill(payload_tpl, replacements))
+        for viz_id_tpl, title, payload_tpl in _VIZ_TEMPLATES
+    )
+
+# ========================================
+# VISUALISATIONS CORRIGÉES
+# ========================================
+
+def _retry_delay(r, attempt):
+    """Délai demandé par Kibana (Retry-After en secondes), sinon backoff exponentiel"""
+    try:
+        return float(r.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return 0.5 * 2 ** attempt
+
+def create_visualization(viz_id, title, payload_bytes):
+    url = f"{KIBANA_URL}/api/saved_objects/visualization/{viz_id}?overwrite=true"
+    
+    # Pas de pause systématique : on n'attend que si Kibana signale une surcharge (429/503)
+    for attempt in range(VIZ_MAX_RETRIES + 1):
+        r = http_post(url, data=payload_bytes, timeout=12)
+        if r is None or r.status_code not in (429, 503) or attempt == VIZ_MAX_RETRIES:
+            break
+        time.sleep(_retry_delay(r, attempt))
+    
+    if r and r.status_code in (200, 201):
+        print(f"  ✓ {title}")
+        return True
+    
+    print(f"  ✗ {title} - {r.status_code if r else 'no response'}")
+    return False
+
+def build_visualizations(data_view_id, fields: Dict[str, str]):
+    print("\n" + "="*80)
+    print("🎨 CRÉATION DES VISUALISATIONS (VERSION FINALE)")
+    print("="*80)
+    
+    ts = str(int(time.time()))
+    
+    field_values = tuple(fields.get(key, _DEFAULT_FIELDS[key]) for key in _FIELD_MARKERS)
+    
+    print(f"\n🔧 Champs utilisés:")
+    for label, value in zip(("aspects", "hashtags", "sentiment", "emotions"), field_values):
+        print(f"  • {label}: {value}")
+    print()
+    
+    # Payloads déjà sérialisés pour ces champs : seul l'id (timestamp) est propre à l'appel
+    compiled = _compile_templates(data_view_id, *field_values)
+    
+    def create_one(template):
+        viz_id_tpl, title, payload_bytes = template
+        viz_id = viz_id_tpl.replace("__TS__", ts)
+        return viz_id, create_visualization(viz_id, title, payload_bytes)
+    
+    # POST indépendants : envoyés en parallèle, résultats relus dans l'ordre des templates
+    # (create_dashboard place les panneaux selon cet ordre)
+    with ThreadPoolExecutor(max_workers=VIZ_WORKERS) as executor:
+        results = list(executor.map(create_one, compiled))
+    
+    created_ids = [viz_id for viz_id, ok in results if ok]
+    
+    print(f"\n✓ {len(created_ids)}/{len(compiled)} visualisations créées")
     return created_ids
 
 # ========================================
 # DASHBOARD
 # ========================================
 
+# Champs communs à tous les panneaux
+_PANEL_BASE = {"version": "8.11.0", "type": "visualization", "embeddableConfig": {}}
+
+# Layout optimisé : (x, y, w, h) dans l'ordre des visualisations
+_LAYOUT = (
+    (0, 0, 12, 8),      # Total Mentions
+    (12, 0, 12, 8),     # Hashtags Uniques
+    (0, 8, 12, 16),     # Sentiments Donut
+    (12, 8, 12, 16),    # Émotions Donut
+    (24, 0, 12, 24),    # Tag Cloud
+    (0, 24, 18, 16),    # Top Hashtags Bar
+    (18, 24, 18, 16),   # Top Aspects Bar
+    (0, 40, 18, 16),    # Sent x Hashtag
+    (18, 40, 18, 16),   # Sent x Aspect
+    (0, 56, 18, 16),    # Aspects Positifs
+    (18, 56, 18, 16),   # Aspects Négatifs
+    (0, 72, 36, 14),    # Timeline
+    (36, 0, 12, 86),    # Guide Markdown
+)
+
+def _precompile_panel(idx, layout):
+    """(gridData, panneau, référence) sans l'id de visualisation, seul élément propre à l'appel"""
+    x, y, w, h = layout
+    return (
+        {"x": x, "y": y, "w": w, "h": h, "i": str(idx)},
+        {**_PANEL_BASE, "panelIndex": str(idx), "panelRefName": f"panel_{idx}"},
+        {"name": f"panel_{idx}", "type": "visualization"}
+    )
+
+_PANEL_TEMPLATES = tuple(_precompile_panel(idx, layout) for idx, layout in enumerate(_LAYOUT, 1))
+
 def create_dashboard(viz_ids, data_view_id):
     if len(viz_ids) < 10:
         print(f"⚠ Seulement {len(viz_ids)}/13 visualisations")
     
-    def vid(i):
-        return viz_ids[i] if i < len(viz_ids) else None
-    
-    # Layout optimisé
-    panels_src = [
-        {"id": vid(0), "x": 0, "y": 0, "w": 12, "h": 8},      # Total Mentions
-        {"id": vid(1), "x": 12, "y": 0, "w": 12, "h": 8},     # Hashtags Uniques
-        {"id": vid(2), "x": 0, "y": 8, "w": 12, "h": 16},     # Sentiments Donut
-        {"id": vid(3), "x": 12, "y": 8, "w": 12, "h": 16},    # Émotions Donut
-        {"id": vid(4), "x": 24, "y": 0, "w": 12, "h": 24},    # Tag Cloud
-        {"id": vid(5), "x": 0, "y": 24, "w": 18, "h": 16},    # Top Hashtags Bar
-        {"id": vid(6), "x": 18, "y": 24, "w": 18, "h": 16},   # Top Aspects Bar
-        {"id": vid(7), "x": 0, "y": 40, "w": 18, "h": 16},    # Sent x Hashtag
-        {"id": vid(8), "x": 18, "y": 40, "w": 18, "h": 16},   # Sent x Aspect
-        {"id": vid(9), "x": 0, "y": 56, "w": 18, "h": 16},    # Aspects Positifs
-        {"id": vid(10), "x": 18, "y": 56, "w": 18, "h": 16},  # Aspects Négatifs
-        {"id": vid(11), "x": 0, "y": 72, "w": 36, "h": 14},   # Timeline
-        {"id": vid(12), "x": 36, "y": 0, "w": 12, "h": 86},   # Guide Markdown
-    ]
-    
+    # viz_ids est dense (les échecs sont retirés) : la i-ème viz prend le i-ème emplacement
     panels = []
     references = []
-    idx = 0
-    
-    for p in panels_src:
-        if not p["id"]:
-            continue
-        idx += 1
-        panels.append({
-            "version": "8.11.0",
-            "type": "visualization",
-            "gridData": {**p, "i": str(idx)},
-            "panelIndex": str(idx),
-            "embeddableConfig": {},
-            "panelRefName": f"panel_{idx}"
-        })
-        references.append({
-            "name": f"panel_{idx}",
-            "type": "visualization",
-            "id": p["id"]
-        })
+    for (grid, panel, ref), viz_id in zip(_PANEL_TEMPLATES, viz_ids):
+        panels.append({**panel, "gridData": {"id": viz_id, **grid}})
+        references.append({**ref, "id": viz_id})
     
     dashboard_id = f"dash-absa-pastel-{int(time.time())}"
     
@@ -868,8 +981,8 @@ def create_dashboard(viz_ids, data_view_id):
         "attributes": {
             "title": "🎨 Dashboard ABSA - Couleurs Pastels",
             "description": "Dashboard ABSA avec palette pastel harmonieuse et markdown enrichi",
-            "panelsJSON": json.dumps(panels),
-            "optionsJSON": json.dumps({
+            "panelsJSON": _dumps(panels),
+            "optionsJSON": _dumps({
                 "useMargins": True,
                 "syncColors": True,
                 "syncCursor": True,
@@ -882,7 +995,7 @@ def create_dashboard(viz_ids, data_view_id):
             "timeTo": "now",
             "refreshInterval": {"pause": False, "value": 30000},
             "kibanaSavedObjectMeta": {
-                "searchSourceJSON": json.dumps({
+                "searchSourceJSON": _dumps({
                     "query": {"query": "", "language": "kuery"},
                     "filter": []
                 })
@@ -892,7 +1005,7 @@ def create_dashboard(viz_ids, data_view_id):
     }
     
     url = f"{KIBANA_URL}/api/saved_objects/dashboard/{dashboard_id}?overwrite=true"
-    r = http_post(url, payload=payload, timeout=15)
+    r = http_post(url, data=_dumps(payload).encode("utf-8"), timeout=15)
     
     if r and r.status_code in (200, 201):
         print("✓ Dashboard créé")
@@ -902,19 +1015,6 @@ def create_dashboard(viz_ids, data_view_id):
     if r:
         print(f"  Response: {r.text[:300]}")
     return None
-def pastel_vis_colors():
-    return {
-        "Positive": PASTEL_COLORS["success"],
-        "Negative": PASTEL_COLORS["danger"],
-        "Neutral": PASTEL_COLORS["fear"],
-        "joy": PASTEL_COLORS["joy"],
-        "love": PASTEL_COLORS["love"],
-        "surprise": PASTEL_COLORS["surprise"],
-        "sadness": PASTEL_COLORS["sadness"],
-        "anger": PASTEL_COLORS["anger"],
-        "fear": PASTEL_COLORS["fear"],
-        "disgust": PASTEL_COLORS["disgust"],
-    }
 
 
 # ========================================
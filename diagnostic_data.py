@@ -2,11 +2,35 @@
 Script de diagnostic - Vérifier la structure exacte des données
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
+try:
+    import orjson
+except ImportError:  # orjson optionnel : json standard
+    orjson = None
+
+if orjson is not None:
+    _loads = orjson.loads
+    
+    def _preview(obj, limit=500):
+        """JSON indenté tronqué ; seule la tranche gardée est décodée"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)[:limit].decode('utf-8', errors='ignore')
+else:
+    _loads = json.loads
+    
+    def _preview(obj, limit=500):
+        return json.dumps(obj, indent=2, ensure_ascii=False)[:limit]
+
 ES_URL = "http://localhost:9200"
 INDEX_PATTERN = "mastodon-trends-*"
 
+# Session partagée : une seule connexion keep-alive pour toutes les requêtes du diagnostic
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_maxsize=16))
+_session.mount("https://", HTTPAdapter(pool_maxsize=16))
+_session.headers.update({"Content-Type": "application/json"})
+
 def check_mapping():
     """Vérifier le mapping Elasticsearch"""
     print("=" * 70)
@@ -14,27 +38,30 @@ def check_mapping():
     print("=" * 70)
     
     try:
-        response = requests.get(f"{ES_URL}/{INDEX_PATTERN}/_mapping", timeout=5)
+        # _field_caps : liste plate des champs (objets déjà aplatis côté ES, « a.b »)
+        response = _session.get(
+            f"{ES_URL}/{INDEX_PATTERN}/_field_caps",
+            params={"fields": "*"},
+            timeout=5
+        )
         data = response.json()
         
-        # Premier index
-        first_index = list(data.keys())[0]
-        properties = data[first_index]['mappings']['properties']
+        # Premier index (les champs couvrent tous les indices du pattern)
+        first_index = data['indices'][0]
+        fields = {
+            name: caps for name, caps in data['fields'].items()
+            if not name.startswith('_')  # champs de métadonnées (_id, _index...)
+        }
         
-        print(f"\nIndex: {first_index}")
+        print(f"\nIndex: {first_index} ({len(data['indices'])} indices)")
         print("\nChamps disponibles:")
-        for field_name, field_info in sorted(properties.items()):
-            field_type = field_info.get('type', 'object')
-            
-            if field_type == 'object' and 'properties' in field_info:
-                print(f"  • {field_name} (object):")
-                for sub_field, sub_info in field_info['properties'].items():
-                    sub_type = sub_info.get('type', 'unknown')
-                    print(f"      - {field_name}.{sub_field}: {sub_type}")
-            else:
-                print(f"  • {field_name}: {field_type}")
+        for field_name, caps in sorted(fields.items()):
+            # Plusieurs types possibles si les indices du pattern divergent
+            field_type = " | ".join(caps)
+            indent = "      - " if "." in field_name else "  • "
+            print(f"{indent}{field_name}: {field_type}")
         
-        return properties
+        return fields
     except Exception as e:
         print(f"✗ Erreur: {e}")
         return None
@@ -46,12 +73,12 @@ def check_sample_docs():
     print("=" * 70)
     
     try:
-        response = requests.get(
+        response = _session.get(
             f"{ES_URL}/{INDEX_PATTERN}/_search",
             params={"size": 3},
             timeout=5
         )
-        data = response.json()
+        data = _loads(response.content)
         hits = data.get('hits', {}).get('hits', [])
         
         for i, hit in enumerate(hits, 1):
@@ -79,11 +106,53 @@ def check_sample_docs():
             
             # Structure complète
             print("\nStructure JSON complète:")
-            print(json.dumps(doc, indent=2, ensure_ascii=False)[:500])
+            print(_preview(doc))
     
     except Exception as e:
         print(f"✗ Erreur: {e}")
 
+def _print_buckets(field, buckets):
+    if buckets:
+        print(f"  ✓ {field} - FONCTIONNE")
+        for bucket in buckets[:3]:
+            print(f"     - {bucket['key']}: {bucket['doc_count']}")
+    else:
+        print(f"  ⚠️  {field} - Aucune donnée")
+
+def _check_single_aggregation(field):
+    """Une requête par champ : sert à isoler le champ fautif quand la requête groupée échoue"""
+    print(f"\n Testing: {field}")
+    try:
+        agg_query = {
+            "size": 0,
+            "aggs": {
+                "test": {
+                    "terms": {
+                        "field": field,
+                        "size": 5
+                    }
+                }
+            }
+        }
+        
+        response = _session.post(
+            f"{ES_URL}/{INDEX_PATTERN}/_search",
+            json=agg_query,
+            timeout=5
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            _print_buckets(field, data.get('aggregations', {}).get('test', {}).get('buckets', []))
+        else:
+            print(f"  ✗ {field} - Erreur {response.status_code}")
+            error = response.json()
+            if 'error' in error:
+                print(f"     Raison: {error['error'].get('type', 'unknown')}")
+                
+    except Exception as e:
+        print(f"  ✗ {field} - Exception: {e}")
+
 def check_aggregations():
     """Tester les aggregations sur chaque champ"""
     print("\n" + "=" * 70)
@@ -97,43 +166,37 @@ def check_aggregations():
         "language"
     ]
     
-    for field in fields_to_test:
+    # Toutes les aggregations dans une seule recherche (un aller-retour, un seul passage sur les shards)
+    agg_query = {
+        "size": 0,
+        "aggs": {
+            f"test_{i}": {"terms": {"field": field, "size": 5}}
+            for i, field in enumerate(fields_to_test)
+        }
+    }
+    
+    try:
+        response = _session.post(
+            f"{ES_URL}/{INDEX_PATTERN}/_search",
+            json=agg_query,
+            timeout=5
+        )
+    except Exception as e:
+        print(f"  ✗ Exception: {e}")
+        return
+    
+    if response.status_code != 200:
+        # Un champ non agrégeable (text sans fielddata...) fait échouer toute la requête :
+        # on repasse champ par champ pour savoir lequel
+        for field in fields_to_test:
+            _check_single_aggregation(field)
+        return
+    
+    aggregations = response.json().get('aggregations', {})
+    for i, field in enumerate(fields_to_test):
         print(f"\n Testing: {field}")
         try:
-            agg_query = {
-                "size": 0,
-                "aggs": {
-                    "test": {
-                        "terms": {
-                            "field": field,
-                            "size": 5
-                        }
-                    }
-                }
-            }
-            
-            response = requests.post(
-                f"{ES_URL}/{INDEX_PATTERN}/_search",
-                json=agg_query,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                buckets = data.get('aggregations', {}).get('test', {}).get('buckets', [])
-                
-                if buckets:
-                    print(f"  ✓ {field} - FONCTIONNE")
-                    for bucket in buckets[:3]:
-                        print(f"     - {bucket['key']}: {bucket['doc_count']}")
-                else:
-                    print(f"  ⚠️  {field} - Aucune donnée")
-            else:
-                print(f"  ✗ {field} - Erreur {response.status_code}")
-                error = response.json()
-                if 'error' in error:
-                    print(f"     Raison: {error['error'].get('type', 'unknown')}")
-                    
+            _print_buckets(field, aggregations[f"test_{i}"].get('buckets', []))
         except Exception as e:
             print(f"  ✗ {field} - Exception: {e}")
 
@@ -4,19 +4,33 @@ Crée des backups en JSON
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain
+
+try:
+    import orjson
+except ImportError:  # orjson optionnel : json standard
+    orjson = None
+
+if orjson is not None:
+    _dumps_bytes = orjson.dumps
+else:
+    def _dumps_bytes(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
 
 # Configuration
 KIBANA_URL = "http://localhost:5601"
 OUTPUT_DIR = "dashboards"
 
-def ensure_output_dir():
-    """Créer le dossier de sortie s'il n'existe pas"""
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        print(f"✓ Dossier '{OUTPUT_DIR}/' créé")
+# Session partagée : la connexion keep-alive à Kibana est réutilisée d'un appel à l'autre
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_SESSION.headers.update({"kbn-xsrf": "true"})
 
 def get_saved_objects(object_type):
     """Récupérer tous les objets sauvegardés d'un type donné"""
@@ -27,12 +41,8 @@ def get_saved_objects(object_type):
         "per_page": 1000
     }
     
-    headers = {
-        "kbn-xsrf": "true"
-    }
-    
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = _SESSION.get(url, params=params, timeout=10)
         if response.status_code == 200:
             data = response.json()
             objects = data.get('saved_objects', [])
@@ -45,6 +55,11 @@ def get_saved_objects(object_type):
         print(f"✗ Erreur : {e}")
         return []
 
+def write_ndjson(filepath, objects):
+    """Format NDJSON : une ligne JSON par objet, écrit en un seul write (exports Kibana : quelques Mo au plus)"""
+    with open(filepath, 'wb') as f:
+        f.write(b'\n'.join(map(_dumps_bytes, objects)) + b'\n')
+
 def export_objects(objects, filename):
     """Exporter des objets au format NDJSON"""
     if not objects:
@@ -54,10 +69,7 @@ def export_objects(objects, filename):
     filepath = os.path.join(OUTPUT_DIR, filename)
     
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            for obj in objects:
-                # Format NDJSON : une ligne JSON par objet
-                f.write(json.dumps(obj, ensure_ascii=False) + '\n')
+        write_ndjson(filepath, objects)
         
         print(f"✓ Exporté : {filepath} ({len(objects)} objets)")
         return True
@@ -65,18 +77,13 @@ def export_objects(objects, filename):
         print(f"✗ Erreur export {filename} : {e}")
         return False
 
-def export_all():
-    """Exporter tous les objets Kibana"""
+def export_all(timestamp):
+    """Exporter tous les objets Kibana (timestamp : suffixe commun des noms de fichiers)"""
     print("=" * 70)
     print("EXPORT KIBANA - DASHBOARDS & VISUALISATIONS")
     print("=" * 70)
     print()
     
-    ensure_output_dir()
-    
-    # Timestamp pour les noms de fichiers
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
     # Export des différents types d'objets
     exports = [
         ("dashboard", f"dashboards_{timestamp}.ndjson"),
@@ -85,10 +92,16 @@ def export_all():
         ("index-pattern", f"index_patterns_{timestamp}.ndjson"),
     ]
     
+    # Les 4 requêtes Kibana sont indépendantes : lancées en parallèle
+    print("Récupération des objets Kibana...")
+    with ThreadPoolExecutor(max_workers=len(exports)) as executor:
+        fetched = list(executor.map(get_saved_objects, [object_type for object_type, _ in exports]))
+    
+    objects_by_type = {}
     results = {}
-    for object_type, filename in exports:
+    for (object_type, filename), objects in zip(exports, fetched):
+        objects_by_type[object_type] = objects
         print(f"\nExport des {object_type}s...")
-        objects = get_saved_objects(object_type)
         success = export_objects(objects, filename)
         results[object_type] = success
     
@@ -103,25 +116,21 @@ def export_all():
     
     print(f"\n📁 Fichiers sauvegardés dans : {OUTPUT_DIR}/")
     print("=" * 70)
+    
+    return objects_by_type
 
-def create_backup_all():
-    """Créer un backup complet en un seul fichier"""
+def create_backup_all(objects_by_type, timestamp):
+    """Créer un backup complet en un seul fichier (objets déjà récupérés par export_all)"""
     print("\n" + "=" * 70)
     print("BACKUP COMPLET")
     print("=" * 70)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     backup_file = os.path.join(OUTPUT_DIR, f"backup_complete_{timestamp}.ndjson")
     
-    all_objects = []
-    for object_type in ["dashboard", "visualization", "search", "index-pattern"]:
-        objects = get_saved_objects(object_type)
-        all_objects.extend(objects)
+    all_objects = list(chain.from_iterable(objects_by_type.values()))
     
     if all_objects:
-        with open(backup_file, 'w', encoding='utf-8') as f:
-            for obj in all_objects:
-                f.write(json.dumps(obj, ensure_ascii=False) + '\n')
+        write_ndjson(backup_file, all_objects)
         
         print(f"✓ Backup complet créé : {backup_file}")
         print(f"  {len(all_objects)} objets sauvegardés")
@@ -130,8 +139,14 @@ def create_backup_all():
 
 def main():
     try:
-        export_all()
-        create_backup_all()
+        # Dossier de sortie (rien à faire s'il existe déjà)
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        
+        # Timestamp unique pour les noms de fichiers : exports et backup du même lancement
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        objects_by_type = export_all(timestamp)
+        create_backup_all(objects_by_type, timestamp)
         
         print("\n💡 POUR RESTAURER :")
         print("   1. Va dans Kibana → Stack Management → Saved Objects")
@@ -0,0 +1,93 @@
+"""
+Cache court (TTL) des infos Redis / Elasticsearch pour les scripts de vérification
+check_config.py et checkout.py lancés coup sur coup ne refont pas les mêmes appels
+Le cache est gardé en mémoire et sur disque (les scripts tournent dans des processus séparés)
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+HC_CACHE_TTL_S = 10
+HC_CACHE_FILE = Path.home() / '.cache' / 'mastodon_absa' / 'hc_cache.json'
+
+# Sections INFO lues par les scripts (version, clients, mémoire) : pas d'INFO complet
+REDIS_INFO_SECTIONS = ('server', 'clients', 'memory')
+
+_memory = {}
+_lock = threading.Lock()
+
+
+def _read_disk():
+    try:
+        with open(HC_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_disk(key, entry):
+    """Écriture atomique (fichier temporaire + os.replace)"""
+    try:
+        HC_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        # Entrées expirées purgées à chaque écriture (le fichier ne grossit pas)
+        data = {
+            k: v for k, v in _read_disk().items()
+            if isinstance(v, list) and len(v) == 2 and entry[0] - v[0] < HC_CACHE_TTL_S
+        }
+        data[key] = entry
+        tmp = HC_CACHE_FILE.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, HC_CACHE_FILE)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def _cache_key(prefix, url):
+    """Clé de cache sans identifiants : user:password@ retiré de l'URL (écrite sur disque)"""
+    parts = urlsplit(url)
+    return f"{prefix}:{parts._replace(netloc=parts.netloc.rpartition('@')[2]).geturl()}"
+
+
+def _cached(key, fetch):
+    """Retourner la valeur en cache si elle a moins de HC_CACHE_TTL_S secondes"""
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key) or _read_disk().get(key)
+    if entry and now - entry[0] < HC_CACHE_TTL_S:
+        return entry[1]
+
+    value = fetch()
+    entry = [now, value]
+    with _lock:
+        _memory[key] = entry
+        _write_disk(key, entry)
+    return value
+
+
+def get_redis_info(url, client=None):
+    """INFO Redis limité à REDIS_INFO_SECTIONS (plusieurs sections par INFO : Redis >= 7)"""
+    def fetch():
+        if client is not None:
+            return client.info(*REDIS_INFO_SECTIONS)
+        from redis_client import get_client
+        return get_client().info(*REDIS_INFO_SECTIONS)
+    return _cached(_cache_key('redis', url), fetch)
+
+
+def get_es_info(url, session=None):
+    """GET / d'Elasticsearch (version, nom du cluster)"""
+    def fetch():
+        if session is not None:
+            response = session.get(url, timeout=3)
+        else:
+            import requests
+            response = requests.get(url, timeout=3)
+        response.raise_for_status()
+        return response.json()
+    return _cached(_cache_key('es', url), fetch)
@@ -9,14 +9,37 @@
 # ================================================
 from dotenv import load_dotenv
 import os
+import re
 import json
 import time
+from html import unescape
+from urllib.parse import urlsplit
 import sys
+import queue
+import threading
 from mastodon import Mastodon, StreamListener
 import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
 from datetime import datetime
 from loguru import logger
 
+try:
+    import orjson
+except ImportError:  # orjson optionnel : json standard
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick optionnel : filtrage par regex
+    ahocorasick = None
+
+if orjson is not None:
+    _dumps_bytes = orjson.dumps
+else:
+    def _dumps_bytes(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
 # ================================================
 # CONFIGURATION DES LOGS
 # ================================================
@@ -34,6 +57,91 @@ logger.add(
 )
 
 
+# ================================================
+# TRAITEMENT ET ENVOI PAR LOTS DANS REDIS
+# ================================================
+# on_update ne fait que déposer le toot brut dans une file bornée ; un thread
+# de traitement le filtre, le normalise et pousse les toots retenus dans Redis
+# par lots (un pipeline = un seul aller-retour) dès qu'on en a PUSH_BATCH_SIZE,
+# et au moins toutes les PUSH_FLUSH_INTERVAL secondes
+# ================================================
+# Taille de la file entre le stream et le thread de traitement : si elle est pleine,
+# le toot est abandonné (compté) plutôt que de ralentir la lecture du stream
+STATUS_QUEUE_SIZE = 1000
+PUSH_BATCH_SIZE = 50
+PUSH_FLUSH_INTERVAL = 0.25
+
+# Taille maximale de la queue Redis : si le consumer s'arrête, on ne garde que
+# les QUEUE_MAX_LENGTH toots les plus récents (les plus anciens sont à gauche, côté BLMPOP)
+QUEUE_MAX_LENGTH = 100000
+
+# Intervalle minimal (secondes) entre deux logs des compteurs
+STATS_LOG_INTERVAL = 1.0
+
+# Marqueur de fin déposé dans la file de traitement par close(),
+# et attente maximale (secondes) du thread toot-worker à l'arrêt
+_STOP = object()
+CLOSE_TIMEOUT = 30
+
+
+# ================================================
+# EXPRESSIONS RÉGULIÈRES (compilées une seule fois)
+# ================================================
+_HTML_TAG_RE = re.compile('<[^<]+?>')  # Balises HTML
+_HASHTAG_RE = re.compile(r'#([a-zA-Z0-9_]+)', re.IGNORECASE)  # #hashtag
+
+
+def _build_filter_re(tags):
+    """
+    Une seule regex pour tous les hashtags suivis (tags en minuscules) :
+    - #tag (avec le #)
+    - tag court (<= 3 caractères) comme mot : "IA" matche dans "j'aime l'IA" mais pas dans "pneumonia"
+    - tag long comme mot entier : "python" matche dans "j'aime python" mais pas dans "pythonic"
+    """
+    short_tags = [re.escape(t) for t in tags if len(t) <= 3]
+    long_tags = [re.escape(t) for t in tags if len(t) > 3]
+    
+    alternatives = [r'#(?:' + '|'.join(re.escape(t) for t in tags) + r')(?:\b|$)']
+    if short_tags:
+        alternatives.append(r'\b(?:' + '|'.join(short_tags) + r')(?:\s|$|[^\w])')
+    if long_tags:
+        alternatives.append(r'\b(?:' + '|'.join(long_tags) + r')\b')
+    return re.compile('|'.join(alternatives))
+
+
+_WORD_CHAR_RE = re.compile(r'\w')
+
+def _build_tag_matcher(tags):
+    """
+    Fonction texte (en minuscules) -> bool : True si un des hashtags suivis y apparaît comme mot
+    Avec pyahocorasick, un automate parcourt le texte une seule fois quel que soit le nombre
+    de hashtags ; sinon on retombe sur la regex de _build_filter_re
+    """
+    if ahocorasick is None:
+        filter_re = _build_filter_re(tags)
+        return lambda text: filter_re.search(text) is not None
+    
+    automaton = ahocorasick.Automaton()
+    for tag in tags:
+        automaton.add_word(tag, len(tag))
+    automaton.make_automaton()
+    
+    def matches(text):
+        # Mêmes règles que la regex : le tag ne doit être collé à aucun caractère de mot
+        # (un # devant est un séparateur, donc #tag est couvert aussi)
+        last = len(text) - 1
+        for end, length in automaton.iter(text):
+            start = end - length + 1
+            if start > 0 and _WORD_CHAR_RE.match(text[start - 1]):
+                continue
+            if end < last and _WORD_CHAR_RE.match(text[end + 1]):
+                continue
+            return True
+        return False
+    
+    return matches
+
+
 # ================================================
 # CLASSE STREAMING LISTENER PERSONNALISÉE
 # ================================================
@@ -56,11 +164,26 @@ class MastodonStreamListener(StreamListener):
         self.queue_name = queue_name
         self.hashtags_to_follow = hashtags_to_follow or []  # Liste des hashtags (sans le #)
         
+        # Hashtags suivis en minuscules (ensemble) et filtre sur le texte construit une fois
+        self._follow_lower = frozenset(h.lower() for h in self.hashtags_to_follow)
+        self._contains_followed = _build_tag_matcher(sorted(self._follow_lower)) if self._follow_lower else None
+        
         # Compteurs pour le monitoring
         self.toot_count = 0
         self.success_count = 0
         self.error_count = 0
         self.filtered_count = 0  # Toots filtrés (qui ne contiennent pas les hashtags)
+        self.dropped_count = 0  # Toots abandonnés (file de traitement pleine)
+        
+        # File vidée par le thread toot-worker : le callback du stream ne fait aucun traitement
+        self._pipe = redis_client.pipeline(transaction=False)
+        self._statuses = queue.Queue(maxsize=STATUS_QUEUE_SIZE)
+        self._last_stats_log = time.monotonic()
+        self._last_logged_counters = None
+        
+        # Démarré en dernier : tous les attributs lus par le thread existent déjà
+        self._worker = threading.Thread(target=self._process_statuses, name="toot-worker", daemon=True)
+        self._worker.start()
         
         logger.info("Stream listener Mastodon initialisé avec succès")
         if self.hashtags_to_follow:
@@ -70,22 +193,34 @@ class MastodonStreamListener(StreamListener):
         """
         Cette méthode est appelée automatiquement par Mastodon.py
         à chaque fois qu'on reçoit un nouveau toot
+        Elle s'exécute dans la boucle de lecture du stream : on dépose juste le toot
+        dans la file, le traitement est fait par le thread toot-worker
         
         Args:
             status: Dictionnaire contenant les données du toot
         """
+        self.toot_count += 1
+        try:
+            self._statuses.put_nowait(status)
+        except queue.Full:
+            self.dropped_count += 1
+    
+    def _process_status(self, status):
+        """
+        Filtre et normalise un toot (thread toot-worker)
+        
+        Args:
+            status: Dictionnaire contenant les données du toot
+        
+        Returns:
+            Le JSON du toot (bytes) à envoyer dans Redis, ou None s'il est filtré
+        """
         try:
-            self.toot_count += 1
-            
-            # Log tous les 10 toots pour ne pas spammer
-            if self.toot_count % 10 == 0:
-                filtered_info = f" | Filtrés : {self.filtered_count}" if self.hashtags_to_follow else ""
-                logger.info(f"Toots reçus : {self.toot_count} | Envoyés avec succès : {self.success_count} | Erreurs : {self.error_count}{filtered_info}")
-            
             # ============================================
-            # EXTRACTION DES DONNÉES DU TOOT
+            # EXTRACTION DU CONTENU ET DES HASHTAGS
             # ============================================
-            # On extrait les champs nécessaires pour le projet
+            # Seuls le contenu et les tags servent au filtrage : le reste
+            # n'est extrait qu'une fois le toot retenu
             # ============================================
             
             # ID unique du toot
@@ -94,49 +229,15 @@ class MastodonStreamListener(StreamListener):
             # Contenu du toot (text HTML, on nettoie les balises HTML)
             content = status.get('content', '')
             # On nettoie les balises HTML simples (basique)
-            import re
-            text = re.sub('<[^<]+?>', '', content)  # Supprime les balises HTML
-            # On nettoie aussi les entités HTML (comme &nbsp;)
-            text = text.replace('&nbsp;', ' ').replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-            
-            # Titre (Mastodon n'a pas de titre, on utilise les premiers mots)
-            title = text[:100] + "..." if len(text) > 100 else text
-            
-            # Auteur du toot
-            account = status.get('account', {})
-            author_id = account.get('acct', '') if account else None  # acct = username@instance
-            author_username = account.get('username', '') if account else None
-            
-            # Date de création (format ISO 8601)
-            created_at = status.get('created_at', '')
-            if created_at:
-                # Convertir en format ISO si nécessaire
-                if isinstance(created_at, str):
-                    created_at = created_at
-                else:
-                    created_at = created_at.isoformat() + "Z"
-            
-            # Langue du toot
-            lang = status.get('language', 'unknown')
-            
-            # Instance Mastodon
-            uri = status.get('uri', '')
-            instance = uri.split('/')[2] if '/' in uri else 'unknown'  # Extrait l'instance de l'URI
-            
-            # URL du toot
-            url = status.get('url', uri)
-            
-            # Score (Mastodon a des favourites et des reblogs)
-            favourites_count = status.get('favourites_count', 0)
-            reblogs_count = status.get('reblogs_count', 0)
-            replies_count = status.get('replies_count', 0)
-            score = favourites_count + reblogs_count
+            # puis les entités HTML (&amp;, &#39;...) en une passe ; &nbsp; devient un espace normal
+            text = unescape(_HTML_TAG_RE.sub('', content)).replace('\xa0', ' ')
             
             # Tags/hashtags
             # Dans Mastodon, les tags sont dans status['tags'] qui est une liste de dictionnaires
             # Chaque tag a la structure : {'name': 'hashtag', 'url': '...'}
             tags = status.get('tags', [])
-            hashtags = []
+            # Ensemble de hashtags en minuscules (dédoublonnés et comparables directement)
+            hashtags_set = set()
             if tags:
                 # Les tags peuvent être des dictionnaires ou des strings
                 for tag in tags:
@@ -150,25 +251,18 @@ class MastodonStreamListener(StreamListener):
                         continue
                     
                     if tag_name:
-                        # On enlève le # au début s'il y en a un
-                        tag_name = tag_name.lstrip('#')
-                        hashtags.append(tag_name)
+                        # On enlève le # au début s'il y en a un, en minuscules dès l'insertion
+                        hashtags_set.add(tag_name.lstrip('#').lower())
             
-            # TOUJOURS extraire les hashtags depuis le texte/contenu HTML aussi
+            # TOUJOURS extraire les hashtags depuis le texte aussi
             # (Même si les tags Mastodon existent, on veut tous les hashtags du texte)
-            # On cherche les mots précédés de # dans le contenu HTML (avant nettoyage)
+            # Une seule passe, sur le texte nettoyé : dans le HTML les hashtags liés sont
+            # écrits "#<span>tag</span>" et "#39" ne serait que l'entité &#39;
             # Format : #hashtag ou #Hashtag (insensible à la casse)
-            hashtag_pattern = r'#([a-zA-Z0-9_]+)'
-            found_hashtags_html = re.findall(hashtag_pattern, content, re.IGNORECASE)
-            found_hashtags_text = re.findall(hashtag_pattern, text, re.IGNORECASE)
-            # Combine les hashtags trouvés dans le texte avec ceux des tags Mastodon
-            all_found_hashtags = list(set(found_hashtags_html + found_hashtags_text))
-            # Convertir en minuscules et enlever les doublons
-            hashtags_from_text = [h.lower() for h in all_found_hashtags]
-            # Combiner avec les hashtags des tags Mastodon (en minuscules aussi)
-            hashtags_existing_lower = [h.lower() for h in hashtags]
-            # Fusionner les deux listes et enlever les doublons
-            hashtags = list(set(hashtags_existing_lower + hashtags_from_text))
+            found_hashtags = _HASHTAG_RE.findall(text)
+            # Combine avec les hashtags des tags Mastodon (en minuscules, sans doublons)
+            hashtags_set.update(map(str.lower, found_hashtags))
+            hashtags = list(hashtags_set)
             
             # ============================================
             # FILTRAGE PAR HASHTAGS (si configuré)
@@ -179,68 +273,77 @@ class MastodonStreamListener(StreamListener):
             if self.hashtags_to_follow:
                 # On vérifie si le toot contient au moins un des hashtags souhaités
                 # Les hashtags sont comparés en minuscules pour être insensibles à la casse
-                hashtags_lower = [h.lower() for h in hashtags]
-                hashtags_to_follow_lower = [h.lower() for h in self.hashtags_to_follow]
-                
-                # On vérifie aussi dans le texte du toot (au cas où le hashtag n'est pas dans les tags)
-                # IMPORTANT : On vérifie aussi dans le contenu HTML original avant nettoyage
-                content_lower = content.lower()  # Contenu HTML original
-                text_lower = text.lower()  # Texte nettoyé
+                # 1. Vérifie dans les hashtags extraits (tags Mastodon + #hashtags du contenu) :
+                #    une intersection d'ensembles, le cas le plus fréquent et le plus fiable
+                contains_hashtag = not self._follow_lower.isdisjoint(hashtags_set)
                 
-                # Vérification : soit dans les tags, soit dans le texte (avec ou sans #)
-                # IMPORTANT : Utilise des word boundaries pour éviter les faux positifs
-                # (ex: "IA" ne doit pas matcher dans "pneumonia")
-                import re
-                contains_hashtag = False
-                for tag in hashtags_to_follow_lower:
-                    # 1. Vérifie dans les tags Mastodon extraits (le plus fiable)
-                    if tag in hashtags_lower:
-                        contains_hashtag = True
-                        break
-                    
-                    # 2. Vérifie les hashtags formatés avec # dans le contenu HTML ou texte
-                    # Format : #hashtag (avec le #)
-                    # On accepte avec ou sans word boundary pour les hashtags avec #
-                    hashtag_pattern_with_hash = r'#' + re.escape(tag) + r'(?:\b|$)'
-                    if re.search(hashtag_pattern_with_hash, content_lower) or re.search(hashtag_pattern_with_hash, text_lower):
-                        contains_hashtag = True
-                        break
-                    
-                    # 3. Vérifie le mot comme mot entier (word boundary) dans le texte
-                    # Format : mot complet (pas comme partie d'un autre mot)
-                    # Ex: "python" matche dans "j'aime python" mais pas dans "pythonic"
-                    # Pour des hashtags courts (2-3 caractères), on est plus permissif
-                    if len(tag) <= 3:
-                        # Pour les tags courts (IA, AI), on cherche juste le mot (mais pas dans un autre mot)
-                        # Ex: "IA" matche dans "j'aime l'IA" mais pas dans "pneumonia"
-                        short_tag_pattern = r'\b' + re.escape(tag) + r'(?:\s|$|[^\w])'
-                        if re.search(short_tag_pattern, text_lower) or re.search(short_tag_pattern, content_lower):
-                            contains_hashtag = True
-                            break
-                    else:
-                        # Pour les tags longs (python, Morocco), on utilise word boundaries strictes
-                        word_pattern = r'\b' + re.escape(tag) + r'\b'
-                        if re.search(word_pattern, text_lower) or re.search(word_pattern, content_lower):
-                            contains_hashtag = True
-                            break
+                if not contains_hashtag:
+                    # 2./3. Sinon #tag ou le tag comme mot dans le contenu HTML original ou le texte nettoyé
+                    # IMPORTANT : Utilise des word boundaries pour éviter les faux positifs
+                    # (ex: "IA" ne doit pas matcher dans "pneumonia")
+                    contains_hashtag = (
+                        self._contains_followed(content.lower())
+                        or self._contains_followed(text.lower())
+                    )
                 
                 # Debug : log les premiers toots filtrés pour voir pourquoi
                 if not contains_hashtag:
                     self.filtered_count += 1
                     # Log de debug pour les 3 premiers toots filtrés (dans le fichier de log)
+                    # Messages formatés par loguru seulement si un sink accepte le niveau DEBUG
                     if self.filtered_count <= 3:
-                        logger.debug(f"Toot filtré #{self.filtered_count} - ID: {toot_id}")
-                        logger.debug(f"  Hashtags trouvés dans les tags : {hashtags}")
-                        logger.debug(f"  Hashtags recherchés : {self.hashtags_to_follow}")
-                        logger.debug(f"  Texte (150 premiers chars) : {text[:150]}")
-                        logger.debug(f"  Contenu HTML (150 premiers chars) : {content[:150]}")
+                        lazy_logger = logger.opt(lazy=True)
+                        lazy_logger.debug("Toot filtré #{} - ID: {}", lambda: self.filtered_count, lambda: toot_id)
+                        lazy_logger.debug("  Hashtags trouvés dans les tags : {}", lambda: hashtags)
+                        lazy_logger.debug("  Hashtags recherchés : {}", lambda: self.hashtags_to_follow)
+                        lazy_logger.debug("  Texte (150 premiers chars) : {}", lambda: text[:150])
+                        lazy_logger.debug("  Contenu HTML (150 premiers chars) : {}", lambda: content[:150])
                     # On continue sans envoyer ce toot dans Redis
-                    return  # On sort de la fonction sans traiter ce toot
+                    return None  # On sort de la fonction sans traiter ce toot
                 else:
                     # Log quand un toot correspond (pour debug)
                     if self.success_count < 3:
                         logger.info(f"✓ Toot correspond trouvé #{self.success_count + 1} - Hashtags : {hashtags}")
             
+            # ============================================
+            # EXTRACTION DES AUTRES CHAMPS
+            # ============================================
+            # Faite seulement pour les toots retenus (la grande majorité est filtrée)
+            # ============================================
+            
+            # Titre (Mastodon n'a pas de titre, on utilise les premiers mots)
+            title = text[:100] + "..." if len(text) > 100 else text
+            
+            # Auteur du toot
+            account = status.get('account', {})
+            author_id = account.get('acct', '') if account else None  # acct = username@instance
+            author_username = account.get('username', '') if account else None
+            
+            # Date de création (format ISO 8601)
+            created_at = status.get('created_at', '')
+            if created_at:
+                # Convertir en format ISO si nécessaire
+                if isinstance(created_at, str):
+                    created_at = created_at
+                else:
+                    created_at = created_at.isoformat() + "Z"
+            
+            # Langue du toot
+            lang = status.get('language', 'unknown')
+            
+            # Instance Mastodon
+            uri = status.get('uri', '')
+            instance = urlsplit(uri).netloc or 'unknown'  # Extrait l'instance (hôte) de l'URI
+            
+            # URL du toot
+            url = status.get('url', uri)
+            
+            # Score (Mastodon a des favourites et des reblogs)
+            favourites_count = status.get('favourites_count', 0)
+            reblogs_count = status.get('reblogs_count', 0)
+            replies_count = status.get('replies_count', 0)
+            score = favourites_count + reblogs_count
+            
             # ============================================
             # CRÉATION DU JSON NORMALISÉ
             # ============================================
@@ -266,52 +369,111 @@ class MastodonStreamListener(StreamListener):
             }
             
             # ============================================
-            # ENVOI DANS REDIS VIA RPUSH
+            # CONVERSION EN JSON
             # ============================================
-            # Conversion en JSON string
-            json_string = json.dumps(toot_json, ensure_ascii=False)
-            
-            # Tentative d'envoi dans Redis avec retry automatique
-            max_retries = 3
-            retry_delay = 1
-            
-            for attempt in range(max_retries):
-                try:
-                    # Envoi du toot dans la queue Redis
-                    self.redis_client.rpush(self.queue_name, json_string)
-                    
-                    # Succès !
-                    self.success_count += 1
-                    
-                    # Log de succès (seulement pour les premiers toots)
-                    if self.success_count <= 5 or attempt > 0:
-                        logger.debug(f"Toot envoyé dans Redis : {toot_id} | Instance: {instance} | Queue: {self.queue_name}")
-                    
-                    break  # On sort de la boucle de retry
-                    
-                except redis.ConnectionError as e:
-                    self.error_count += 1
-                    logger.warning(f"Erreur de connexion Redis (tentative {attempt + 1}/{max_retries}): {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_delay * (attempt + 1))  # Délai progressif
-                    else:
-                        logger.error(f"Impossible d'envoyer le toot {toot_id} après {max_retries} tentatives")
-                        
-                except redis.RedisError as e:
-                    self.error_count += 1
-                    logger.error(f"Erreur Redis lors de l'envoi du toot {toot_id}: {e}")
-                    break
-                    
-                except Exception as e:
-                    self.error_count += 1
-                    logger.error(f"Erreur inattendue lors de l'envoi du toot {toot_id}: {e}")
-                    break
+            # Bytes UTF-8, envoyés tels quels à Redis (RPUSH par lots)
+            return _dumps_bytes(toot_json)
             
         except Exception as e:
             # Erreur générale dans le traitement du toot
             self.error_count += 1
             logger.error(f"Erreur lors du traitement d'un toot : {e}")
             logger.debug(f"Détails du toot problématique : {status.get('id', 'N/A')}")
+            return None
+    
+    def _log_stats(self):
+        """Log des compteurs de collecte (un seul message pour tous les compteurs)"""
+        if self.hashtags_to_follow:
+            logger.info(
+                "Toots reçus : {} | Envoyés avec succès : {} | Erreurs : {} | Filtrés : {} | Abandonnés : {}",
+                self.toot_count, self.success_count, self.error_count, self.filtered_count, self.dropped_count
+            )
+        else:
+            logger.info(
+                "Toots reçus : {} | Envoyés avec succès : {} | Erreurs : {} | Abandonnés : {}",
+                self.toot_count, self.success_count, self.error_count, self.dropped_count
+            )
+    
+    def _process_statuses(self):
+        """
+        Thread toot-worker : traite les toots de la file et envoie les toots retenus
+        par lots de PUSH_BATCH_SIZE, ou plus tôt si PUSH_FLUSH_INTERVAL secondes sont passées
+        S'arrête sur le marqueur _STOP déposé par close(), après avoir envoyé le dernier lot
+        """
+        batch = []
+        last_push = time.monotonic()
+        while True:
+            try:
+                status = self._statuses.get(timeout=PUSH_FLUSH_INTERVAL)
+            except queue.Empty:
+                status = None
+            
+            if status is _STOP:
+                break
+            if status is not None:
+                json_bytes = self._process_status(status)
+                if json_bytes is not None:
+                    batch.append(json_bytes)
+            
+            now = time.monotonic()
+            if batch and (len(batch) >= PUSH_BATCH_SIZE or now - last_push >= PUSH_FLUSH_INTERVAL):
+                self._push_batch(batch)
+                batch = []
+                last_push = now
+            
+            # Compteurs regroupés en un seul log au plus toutes les STATS_LOG_INTERVAL secondes,
+            # et seulement s'ils ont bougé (pas de log répété quand le stream est calme)
+            if now - self._last_stats_log >= STATS_LOG_INTERVAL:
+                self._last_stats_log = now
+                counters = (self.toot_count, self.success_count, self.error_count, self.dropped_count)
+                if counters != self._last_logged_counters:
+                    self._last_logged_counters = counters
+                    self._log_stats()
+        
+        if batch:
+            self._push_batch(batch)
+    
+    def _push_batch(self, batch):
+        """
+        Envoie un lot dans Redis en un seul aller-retour (pipeline), puis borne la queue
+        Les erreurs de connexion sont déjà retentées par la politique Retry du client
+        """
+        try:
+            for json_bytes in batch:
+                self._pipe.rpush(self.queue_name, json_bytes)
+            # Un seul LTRIM par lot, dans le même aller-retour
+            self._pipe.ltrim(self.queue_name, -QUEUE_MAX_LENGTH, -1)
+            self._pipe.execute()
+            
+            # Succès !
+            self.success_count += len(batch)
+            
+            # Log de succès (seulement pour les premiers lots)
+            if self.success_count <= 5 * PUSH_BATCH_SIZE:
+                logger.debug(f"{len(batch)} toot(s) envoyé(s) dans Redis | Queue: {self.queue_name}")
+            
+        except redis.RedisError as e:
+            self.error_count += 1
+            logger.error(f"Impossible d'envoyer {len(batch)} toot(s) dans Redis : {e}")
+            
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"Erreur inattendue lors de l'envoi de {len(batch)} toot(s): {e}")
+            
+        finally:
+            self._pipe.reset()
+    
+    def close(self):
+        """Arrête le thread toot-worker après avoir traité et envoyé les toots encore en file"""
+        if not self._worker.is_alive():
+            logger.error("Le thread toot-worker s'est arrêté : toots restés en file non envoyés")
+            return
+        try:
+            self._statuses.put(_STOP, timeout=CLOSE_TIMEOUT)
+        except queue.Full:
+            logger.error("File de traitement toujours pleine : arrêt sans attendre le thread toot-worker")
+            return
+        self._worker.join(CLOSE_TIMEOUT)
     
     def on_notification(self, notification):
         """
@@ -396,7 +558,18 @@ def main():
     # CONNEXION À REDIS
     # ============================================
     try:
-        redis_client = redis.from_url(redis_url, decode_responses=True)
+        # Pool bloquant (attend une connexion libre au lieu d'en ouvrir sans limite)
+        # Réponses laissées en bytes : on n'envoie que des JSON déjà encodés, rien à décoder
+        # Retry géré par redis-py (backoff exponentiel) sur coupure de connexion
+        pool = redis.BlockingConnectionPool.from_url(
+            redis_url,
+            max_connections=4,
+            timeout=5,
+            socket_keepalive=True,
+            retry=Retry(ExponentialBackoff(cap=2, base=0.1), 3),
+            retry_on_error=[redis.ConnectionError, redis.TimeoutError]
+        )
+        redis_client = redis.Redis(connection_pool=pool)
         redis_client.ping()
         logger.info("Connexion à Redis réussie ✓")
         
@@ -464,6 +637,9 @@ def main():
         logger.error(f"Erreur fatale : {e}")
         
     finally:
+        # Traitement et envoi des derniers toots encore en file, puis arrêt du thread
+        listener.close()
+        
         logger.info("")
         logger.info("=" * 60)
         logger.info("RÉSUMÉ DE LA COLLECTE")
@@ -471,6 +647,7 @@ def main():
         logger.info(f"Toots reçus : {listener.toot_count}")
         if listener.hashtags_to_follow:
             logger.info(f"Toots filtrés (sans hashtags) : {listener.filtered_count}")
+        logger.info(f"Toots abandonnés (file pleine) : {listener.dropped_count}")
         logger.info(f"Toots envoyés avec succès : {listener.success_count}")
         logger.info(f"Erreurs : {listener.error_count}")
         logger.info("")
@@ -0,0 +1,31 @@
+"""
+Client Redis partagé par les scripts utilitaires (check_config, checkout, clear_queue)
+Un seul ConnectionPool par processus au lieu d'un pool par redis.from_url()
+"""
+
+import os
+import threading
+
+import redis
+
+_redis_pool = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    """Pool créé au premier appel (REDIS_URL lu après un éventuel load_dotenv)"""
+    global _redis_pool
+    with _lock:
+        if _redis_pool is None:
+            _redis_pool = redis.ConnectionPool.from_url(
+                os.getenv('REDIS_URL', 'redis://localhost:6379'),
+                max_connections=4,
+                socket_connect_timeout=2,
+                socket_keepalive=True,
+                decode_responses=True,
+            )
+    return _redis_pool
+
+
+def get_client():
+    return redis.Redis(connection_pool=get_pool())